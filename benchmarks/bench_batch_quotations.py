@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of grouped batch quotation generation (om_service_sale).
+
+Creates synthetic confirmed appointments, bills them once with the
+per-appointment action and once with the grouped batch action, prints
+timings and query counts, then rolls everything back.
+
+Usage (needs a database with om_service_sale installed):
+    BENCH_APPOINTMENTS=5000 BENCH_CUSTOMERS=250 \\
+        odoo-bin shell -c odoo.conf -d <db> --no-http < benchmarks/bench_batch_quotations.py
+"""
+
+import os
+import time
+from datetime import datetime, timedelta
+
+N_APPOINTMENTS = int(os.environ.get("BENCH_APPOINTMENTS", 5000))
+N_CUSTOMERS = int(os.environ.get("BENCH_CUSTOMERS", 250))
+
+
+def make_appointments(env, label):
+    service = env["booking.service"].create(
+        {
+            "name": f"Bench Service {label}",
+            "duration": 1.0,
+            "price": 50.0,
+            "max_concurrent_bookings": 0,
+        }
+    )
+    customers = env["res.partner"].create(
+        [{"name": f"Bench Customer {label} {i}"} for i in range(N_CUSTOMERS)]
+    )
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(
+        days=1
+    )
+    return (
+        env["service.appointment"]
+        .create(
+            [
+                {
+                    "customer_id": customers[i % N_CUSTOMERS].id,
+                    "service_id": service.id,
+                    "booking_date": start + timedelta(hours=i),
+                    "state": "confirmed",
+                }
+                for i in range(N_APPOINTMENTS)
+            ]
+        )
+    )
+
+
+def measure(env, label, run):
+    env.flush_all()
+    env.invalidate_all()
+    queries = env.cr.sql_log_count
+    began = time.perf_counter()
+    run()
+    env.flush_all()
+    elapsed = time.perf_counter() - began
+    print(
+        f"{label}: {N_APPOINTMENTS} appointments in {elapsed:.2f}s "
+        f"({N_APPOINTMENTS / elapsed:,.0f}/s), {env.cr.sql_log_count - queries} queries"
+    )
+
+
+def main(env):
+    env = env(context=dict(env.context, tracking_disable=True))
+
+    appointments = make_appointments(env, "single")
+
+    def per_appointment():
+        for appointment in appointments:
+            appointment.action_create_sale_order()
+
+    measure(env, "per-appointment", per_appointment)
+
+    appointments = make_appointments(env, "batch")
+    measure(env, "grouped batch", appointments.action_create_sale_orders_batch)
+
+    env.cr.rollback()
+
+
+main(env)  # noqa: F821 - provided by odoo-bin shell
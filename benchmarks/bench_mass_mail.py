@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of mass-mode reminder emails (om_service_operation).
+
+Starts a local SMTP sink, points a temporary outgoing mail server at it,
+then sends the reminder template to synthetic appointments once per
+appointment (``send_mail(force_send=True)``) and once through the batch
+path of ``EmailService``. Prints timings, emails per second, query counts
+and the number of SMTP connections opened, then rolls everything back.
+
+Usage (needs a database with om_service_operation installed):
+    BENCH_APPOINTMENTS=2000 \\
+        odoo-bin shell -c odoo.conf -d <db> --no-http < benchmarks/bench_mass_mail.py
+"""
+
+import os
+import socketserver
+import threading
+import time
+from datetime import datetime, timedelta
+
+N_APPOINTMENTS = int(os.environ.get("BENCH_APPOINTMENTS", 2000))
+SINK_PORT = int(os.environ.get("BENCH_SMTP_PORT", 2525))
+
+
+class SinkHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP server accepting and discarding every message."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 sink ready")
+        in_data = False
+
+        for raw in self.rfile:
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            if in_data:
+                if line == ".":
+                    in_data = False
+                    self.server.messages += 1
+                    self.reply("250 queued")
+                continue
+
+            command = line[:4].upper()
+            if command == "EHLO":
+                self.reply("250-sink")
+                self.reply("250 8BITMIME")
+            elif command == "DATA":
+                in_data = True
+                self.reply("354 end with .")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+class SinkServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+    connections = 0
+    messages = 0
+
+
+def make_appointments(env, label):
+    service = env["booking.service"].create(
+        {
+            "name": f"Bench Service {label}",
+            "duration": 1.0,
+            "price": 50.0,
+            "max_concurrent_bookings": 0,
+        }
+    )
+    customer = env["res.partner"].create(
+        {"name": f"Bench Customer {label}", "email": "bench@example.com"}
+    )
+    start = datetime.now().replace(second=0, microsecond=0) + timedelta(hours=1)
+    return env["service.appointment"].create(
+        [
+            {
+                "customer_id": customer.id,
+                "service_id": service.id,
+                "booking_date": start + timedelta(seconds=i),
+                "state": "confirmed",
+            }
+            for i in range(N_APPOINTMENTS)
+        ]
+    )
+
+
+def measure(env, sink, label, run):
+    env.flush_all()
+    env.invalidate_all()
+    queries = env.cr.sql_log_count
+    connections, messages = sink.connections, sink.messages
+    began = time.perf_counter()
+    run()
+    env.flush_all()
+    elapsed = time.perf_counter() - began
+    sent = sink.messages - messages
+    print(
+        f"{label}: {sent} emails in {elapsed:.2f}s ({sent / elapsed:,.0f}/s), "
+        f"{env.cr.sql_log_count - queries} queries, "
+        f"{sink.connections - connections} SMTP connections"
+    )
+
+
+def main(env):
+    from odoo.addons.om_service_operation.services.email_service import EmailService
+
+    env = env(context=dict(env.context, tracking_disable=True))
+
+    sink = SinkServer(("127.0.0.1", SINK_PORT), SinkHandler)
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+
+    env["ir.mail_server"].search([]).write({"active": False})
+    env["ir.mail_server"].create(
+        {
+            "name": "Bench SMTP sink",
+            "smtp_host": "127.0.0.1",
+            "smtp_port": SINK_PORT,
+            "smtp_encryption": "none",
+        }
+    )
+    template = env.ref("om_service_operation.email_appointment_reminder").sudo()
+
+    try:
+        # Only the benchmark's appointments are due for a reminder
+        env["service.appointment"].search([("reminder_due_at", "!=", False)]).write(
+            {"reminder_count": 99}
+        )
+
+        appointments = make_appointments(env, "single")
+
+        def per_appointment():
+            for appointment in appointments:
+                template.send_mail(appointment.id, force_send=True)
+                appointment._mark_reminder_sent()
+
+        measure(env, sink, "per-appointment", per_appointment)
+
+        make_appointments(env, "batch")
+        measure(env, sink, "mass mode", EmailService(env).send_reminder_emails)
+    finally:
+        sink.shutdown()
+        env.cr.rollback()
+
+
+main(env)  # noqa: F821 - provided by odoo-bin shell
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the vectorized occupancy engine used by the capacity
+utilization report (om_service_operation/services/occupancy.py).
+
+Runs without an Odoo server: synthetic appointment intervals spread over a
+year are folded into hourly buckets and a (weekday, hour) histogram.
+
+Usage:
+    python benchmarks/bench_utilization.py [--intervals 3000000] [--services 50]
+"""
+
+import argparse
+import importlib.util
+import os
+import time
+
+import numpy as np
+
+ENGINE_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "om_service_operation", "services", "occupancy.py"
+)
+
+
+def load_engine():
+    spec = importlib.util.spec_from_file_location("occupancy", ENGINE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def naive_timeline(groups, starts, ends, n_groups, n_buckets):
+    """Row-by-row reference implementation."""
+    timeline = np.zeros((n_groups, n_buckets))
+    for group, start, end in zip(groups, starts, ends):
+        bucket = int(start)
+        while bucket < end and bucket < n_buckets:
+            overlap = min(end, bucket + 1) - max(start, bucket)
+            if bucket >= 0 and overlap > 0:
+                timeline[group, bucket] += overlap
+            bucket += 1
+    return timeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--intervals", type=int, default=3_000_000)
+    parser.add_argument("--services", type=int, default=50)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--naive-sample", type=int, default=50_000)
+    args = parser.parse_args()
+
+    engine = load_engine()
+    rng = np.random.default_rng(42)
+    n_buckets = args.days * 24
+
+    groups = rng.integers(0, args.services, args.intervals)
+    starts = np.floor(rng.uniform(0, n_buckets, args.intervals) * 4) / 4
+    ends = starts + rng.choice([0.5, 1.0, 1.5, 2.0, 3.0], args.intervals)
+    week_slots = (np.arange(n_buckets) + 3 * 24) % engine.HOURS_PER_WEEK
+    capacities = rng.integers(0, 5, args.services)
+
+    began = time.perf_counter()
+    timeline = engine.occupancy_timeline(
+        groups, starts, ends, args.services, n_buckets
+    )
+    booked, hours = engine.weekly_histogram(timeline, week_slots)
+    engine.utilization(booked, hours, capacities)
+    elapsed = time.perf_counter() - began
+
+    print(
+        f"vectorized: {args.intervals:,} intervals, {args.services} services, "
+        f"{n_buckets:,} hourly buckets in {elapsed:.3f}s "
+        f"({args.intervals / elapsed:,.0f} intervals/s)"
+    )
+
+    sample = slice(0, args.naive_sample)
+    began = time.perf_counter()
+    reference = naive_timeline(
+        groups[sample], starts[sample], ends[sample], args.services, n_buckets
+    )
+    naive_elapsed = time.perf_counter() - began
+    check = engine.occupancy_timeline(
+        groups[sample], starts[sample], ends[sample], args.services, n_buckets
+    )
+
+    print(
+        f"row-by-row: {args.naive_sample:,} intervals in {naive_elapsed:.3f}s "
+        f"({args.naive_sample / naive_elapsed:,.0f} intervals/s), "
+        f"max deviation {np.abs(reference - check).max():.2e}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+"""
+Stress test of capacity enforcement under concurrent bookings.
+
+Runs four scenarios, each on a dedicated service with a small capacity:
+concurrent ``/booking/create`` submissions and concurrent direct
+``service.appointment`` creates (overlap check then create, each in its own
+transaction, as the website controller does), both against a few hot slots
+and against spread-out slots. Prints bookings per second, p50/p99 latency,
+rejections, serialization failures and every slot where the bookings
+holding capacity exceed ``max_concurrent_bookings``.
+
+Unlike the benchmarks, the workers need to see each other's data, so
+everything is committed; the script deletes its services, appointments
+and customers at the end. Run it on a disposable database.
+
+Usage (needs a database with om_website_booking installed):
+    BENCH_URL=http://localhost:8069 BENCH_THREADS=16 BENCH_ATTEMPTS=400 \\
+        odoo-bin shell -c odoo.conf -d <db> --no-http < benchmarks/stress_booking_contention.py
+
+The HTTP scenarios need a server on BENCH_URL started with several
+``--workers``, and are skipped when BENCH_URL is empty. Confirmation
+emails are sent during ``/booking/create``: point the outgoing mail
+server to a sink (see bench_mass_mail.py) to keep SMTP out of the latency.
+"""
+
+import os
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timedelta
+from http.cookiejar import CookieJar
+
+import psycopg2.errors
+import pytz
+
+BASE_URL = os.environ.get("BENCH_URL", "").rstrip("/")
+N_THREADS = int(os.environ.get("BENCH_THREADS", 16))
+N_ATTEMPTS = int(os.environ.get("BENCH_ATTEMPTS", 400))
+CAPACITY = int(os.environ.get("BENCH_CAPACITY", 2))
+N_HOT_SLOTS = int(os.environ.get("BENCH_HOT_SLOTS", 3))
+
+# Transaction conflicts surfaced by PostgreSQL under contention
+SERIALIZATION_ERRORS = (
+    psycopg2.errors.SerializationFailure,
+    psycopg2.errors.DeadlockDetected,
+    psycopg2.errors.LockNotAvailable,
+)
+
+CSRF_TOKEN = re.compile(r'name="csrf_token" value="([^"]+)"')
+UNAVAILABLE = re.compile(r"unavailable|fully booked|not available|conflict", re.I)
+# Generic error page of /booking/create: serialization failures must not
+# end there, they are retried by Odoo (and answered 500 once out of tries)
+GENERIC_ERROR = re.compile(
+    r"An error occurred while creating your booking|An unexpected error occurred"
+)
+
+
+def local_slots(target, tz_name):
+    """Naive local start times of the attempts: a few hot slots or one slot each."""
+    first_day = (datetime.now(pytz.timezone(tz_name)) + timedelta(days=1)).replace(
+        hour=0, minute=0, second=0, microsecond=0, tzinfo=None
+    )
+    if target == "hot":
+        return [
+            first_day + timedelta(hours=8 + i % N_HOT_SLOTS) for i in range(N_ATTEMPTS)
+        ]
+    # Business hours of consecutive days
+    return [
+        first_day + timedelta(days=i // 9, hours=8 + i % 9) for i in range(N_ATTEMPTS)
+    ]
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class HttpClient:
+    """One website visitor: own session cookie and CSRF token."""
+
+    def __init__(self, service_id):
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(CookieJar())
+        )
+        page = self.opener.open(f"{BASE_URL}/booking/service/{service_id}").read()
+        self.csrf_token = CSRF_TOKEN.search(page.decode()).group(1)
+
+    def book(self, service_id, local_start, index):
+        data = urllib.parse.urlencode(
+            {
+                "csrf_token": self.csrf_token,
+                "service_id": service_id,
+                "customer_name": f"Stress Customer {index % N_THREADS}",
+                "customer_email": f"stress{index % N_THREADS}@example.com",
+                "customer_phone": "0901234567",
+                "booking_date": local_start.strftime("%Y-%m-%dT%H:%M"),
+            }
+        ).encode()
+        try:
+            response = self.opener.open(f"{BASE_URL}/booking/create", data)
+        except urllib.error.HTTPError as e:
+            # Includes the requests whose serialization retries ran out
+            return "http_error" if e.code >= 500 else "error"
+        if "/booking/success/" in response.geturl():
+            return "booked"
+        body = response.read().decode()
+        if GENERIC_ERROR.search(body):
+            return "error_page"
+        if UNAVAILABLE.search(body):
+            return "rejected"
+        return "error"
+
+
+def direct_book(registry, service, customer_id, start):
+    """Overlap check then create in a transaction of its own, like the website."""
+    from odoo import api, SUPERUSER_ID
+    from odoo.exceptions import ValidationError
+
+    try:
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {"tracking_disable": True})
+            Appointment = env["service.appointment"]
+            has_overlap, _conflict, _message = Appointment.check_overlap(
+                booking_date=start,
+                end_date=start + timedelta(hours=service["duration"]),
+                service_id=service["id"],
+            )
+            if has_overlap:
+                return "rejected"
+            Appointment.create(
+                {
+                    "customer_id": customer_id,
+                    "service_id": service["id"],
+                    "booking_date": start,
+                    "state": "confirmed",
+                }
+            )
+        return "booked"
+    except SERIALIZATION_ERRORS:
+        return "serialization"
+    except ValidationError:
+        return "rejected"
+    except Exception:
+        return "error"
+
+
+def run_attempts(attempt, count):
+    """Run ``attempt(index, state)`` ``count`` times over the worker threads."""
+    results = []
+    lock = threading.Lock()
+    indexes = iter(range(count))
+
+    def worker():
+        state = {}
+        while True:
+            with lock:
+                index = next(indexes, None)
+            if index is None:
+                return
+            began = time.perf_counter()
+            outcome = attempt(index, state)
+            elapsed = time.perf_counter() - began
+            with lock:
+                results.append((outcome, elapsed))
+
+    threads = [threading.Thread(target=worker) for _i in range(N_THREADS)]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - began
+
+
+def overbooked_slots(env, service):
+    """Segments where the appointments holding capacity exceed it."""
+    from odoo.addons.om_service_operation.services.appointment_service import (
+        sweep_timeline,
+    )
+
+    env.cr.execute(
+        """
+        SELECT booking_date, end_date
+          FROM service_appointment
+         WHERE service_id = %s AND state != 'cancel'
+        """,
+        [service.id],
+    )
+    intervals = env.cr.fetchall()
+    if not intervals:
+        return []
+    timeline = sweep_timeline(
+        intervals,
+        min(start for start, _end in intervals),
+        max(end for _start, end in intervals),
+    )
+    return [segment for segment in timeline if segment[2] > CAPACITY]
+
+
+def db_conflicts(env):
+    """Deadlocks and rolled back transactions counted by PostgreSQL so far."""
+    env.cr.execute("SELECT pg_stat_clear_snapshot()")
+    env.cr.execute(
+        """
+        SELECT deadlocks, xact_rollback
+          FROM pg_stat_database
+         WHERE datname = current_database()
+        """
+    )
+    return env.cr.fetchone()
+
+
+def report(label, results, elapsed, overbooked, conflicts):
+    counts = {}
+    for outcome, _latency in results:
+        counts[outcome] = counts.get(outcome, 0) + 1
+    latencies = [latency for _outcome, latency in results]
+    booked = counts.get("booked", 0)
+
+    print(
+        f"{label}: {len(results)} attempts by {N_THREADS} threads in {elapsed:.2f}s, "
+        f"{booked} booked ({booked / elapsed:,.1f} bookings/s, "
+        f"{len(results) / elapsed:,.1f} attempts/s), "
+        f"{counts.get('rejected', 0)} rejected, "
+        f"{counts.get('serialization', 0)} serialization failures, "
+        f"{counts.get('http_error', 0)} HTTP 5xx, "
+        f"{counts.get('error_page', 0)} generic error pages, "
+        f"{counts.get('error', 0)} errors; "
+        f"latency p50 {percentile(latencies, 0.5) * 1000:.0f}ms "
+        f"p99 {percentile(latencies, 0.99) * 1000:.0f}ms; "
+        f"PostgreSQL deadlocks +{conflicts[0]}, rollbacks +{conflicts[1]}"
+    )
+    if counts.get("error_page"):
+        print(
+            f"  GENERIC ERROR PAGE on {counts['error_page']} attempt(s): failures "
+            f"(e.g. serialization) were swallowed instead of retried"
+        )
+    if overbooked:
+        print(f"  CAPACITY EXCEEDED on {len(overbooked)} segment(s):")
+        for start, end, count in overbooked:
+            print(f"    {start} - {end}: {count}/{CAPACITY} bookings")
+    else:
+        print(f"  capacity respected (max {CAPACITY} concurrent bookings)")
+
+
+def run_scenario(env, channel, target, tz_name):
+    service = env["booking.service"].create(
+        {
+            "name": f"Stress Service {channel} {target} {int(time.time())}",
+            "duration": 1.0,
+            "price": 50.0,
+            "max_concurrent_bookings": CAPACITY,
+        }
+    )
+    customer = env["res.partner"].create(
+        {"name": f"Stress Customer {channel} {target}", "email": "stress@example.com"}
+    )
+    env.cr.commit()
+
+    timezone = pytz.timezone(tz_name)
+    slots = local_slots(target, tz_name)
+
+    if channel == "http":
+        service_id = service.id
+
+        def attempt(index, state):
+            if "client" not in state:
+                state["client"] = HttpClient(service_id)
+            return state["client"].book(service_id, slots[index], index)
+
+    else:
+        values = {"id": service.id, "duration": service.duration}
+
+        def attempt(index, state):
+            start = timezone.localize(slots[index]).astimezone(pytz.UTC)
+            return direct_book(
+                env.registry, values, customer.id, start.replace(tzinfo=None)
+            )
+
+    before = db_conflicts(env)
+    results, elapsed = run_attempts(attempt, N_ATTEMPTS)
+    # New snapshot: see what the workers committed
+    env.cr.rollback()
+    after = db_conflicts(env)
+
+    report(
+        f"{channel}/{target}",
+        results,
+        elapsed,
+        overbooked_slots(env, service),
+        [after[0] - before[0], after[1] - before[1]],
+    )
+
+
+def cleanup(env):
+    services = (
+        env["booking.service"]
+        .with_context(active_test=False)
+        .search([("name", "=like", "Stress Service %")])
+    )
+    appointments = env["service.appointment"].search(
+        [("service_id", "in", services.ids)]
+    )
+    customers = appointments.customer_id | env["res.partner"].search(
+        [("email", "=like", "stress%@example.com")]
+    )
+    appointments.unlink()
+    services.unlink()
+    customers.filtered(lambda partner: not partner.user_ids).unlink()
+    env.cr.commit()
+
+
+def main(env):
+    env = env(context=dict(env.context, tracking_disable=True))
+    tz_name = env.ref("base.public_user").tz or "Asia/Ho_Chi_Minh"
+
+    channels = ["http", "direct"] if BASE_URL else ["direct"]
+    try:
+        for channel in channels:
+            for target in ("hot", "spread"):
+                run_scenario(env, channel, target, tz_name)
+    finally:
+        env.cr.rollback()
+        cleanup(env)
+
+
+main(env)  # noqa: F821 - provided by odoo-bin shell
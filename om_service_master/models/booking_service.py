@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from odoo.tools.sql import escape_psql
 
 
 class BookingService(models.Model):
@@ -12,7 +13,7 @@ class BookingService(models.Model):
     name = fields.Char(
         string="Service Name",
         required=True,
-        index=True,
+        index="trigram",
         help="Name of the service offered to customers",
     )
 
@@ -27,6 +28,7 @@ class BookingService(models.Model):
         string="Duration (Hours)",
         default=1.0,
         required=True,
+        index=True,
         help="Time required to complete the service in hours",
     )
 
@@ -34,6 +36,7 @@ class BookingService(models.Model):
         string="Price",
         currency_field="currency_id",
         required=True,
+        index=True,
         help="Standard price for this service",
     )
 
@@ -69,7 +72,9 @@ class BookingService(models.Model):
     )
 
     description = fields.Text(
-        string="Description", help="Detailed description of the service"
+        string="Description",
+        index="trigram",
+        help="Detailed description of the service",
     )
 
     # Service Detail Page Fields
@@ -137,6 +142,83 @@ class BookingService(models.Model):
             else:
                 record.slug = False
 
+    @api.model
+    def search_catalog(
+        self,
+        query=None,
+        price_min=None,
+        price_max=None,
+        duration_min=None,
+        duration_max=None,
+        limit=None,
+        offset=0,
+    ):
+        """Active services matching a catalog search, best matches first.
+
+        ``query`` is matched against the name and description: substring
+        matches, plus names similar to the query when pg_trgm is available,
+        so both are served by the trigram indexes. Services whose name starts
+        with the query come first, then by name similarity. Without a query,
+        services are sorted by name. Price and duration bounds are inclusive.
+
+        Returns ``(services, total)``, ``services`` being the requested page
+        and ``total`` the number of matching services.
+        """
+        self.flush_model()
+
+        conditions = ["active"]
+        order = []
+        params = {"limit": limit, "offset": offset or 0}
+
+        for column, operator, key, value in (
+            ("price", ">=", "price_min", price_min),
+            ("price", "<=", "price_max", price_max),
+            ("duration", ">=", "duration_min", duration_min),
+            ("duration", "<=", "duration_max", duration_max),
+        ):
+            if value is not None:
+                params[key] = value
+                conditions.append(f"{column} {operator} %({key})s")
+
+        query = (query or "").strip()
+        if query:
+            params.update(
+                query=query,
+                pattern=f"%{escape_psql(query)}%",
+                prefix=f"{escape_psql(query)}%",
+            )
+            matches = ["name ILIKE %(pattern)s", "description ILIKE %(pattern)s"]
+            order.append("name ILIKE %(prefix)s DESC")
+            if self.env.registry.has_trigram:
+                # Typo tolerance: names sharing enough trigrams with the query
+                matches.append("name %% %(query)s")
+                order.append("similarity(name, %(query)s) DESC")
+            conditions.append(f"({' OR '.join(matches)})")
+
+        self.env.cr.execute(
+            f"""
+            SELECT id, COUNT(*) OVER ()
+              FROM booking_service
+             WHERE {' AND '.join(conditions)}
+          ORDER BY {', '.join(order + ['name', 'id'])}
+             LIMIT %(limit)s OFFSET %(offset)s
+            """,
+            params,
+        )
+        rows = self.env.cr.fetchall()
+
+        if rows:
+            total = rows[0][1]
+        elif offset:
+            # Page past the end: count the matches on their own
+            total = self.search_catalog(
+                query, price_min, price_max, duration_min, duration_max, limit=1
+            )[1]
+        else:
+            total = 0
+
+        return self.browse([row[0] for row in rows]), total
+
     def get_detail_url(self):
         """Get the URL for service detail page."""
         self.ensure_one()
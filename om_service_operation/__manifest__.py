@@ -17,23 +17,43 @@
         * Calendar and Kanban views
         * Email notifications via Chatter
         * Activity management
+        * Capacity utilization report (requires numpy)
+        * Archiving of historical appointments
+        * Optional lightweight audit log instead of chatter
+        * Short-lived slot holds during online checkout
+        * Recurring appointment series with up-front conflict detection
+        * Reminder emails at configurable offsets per service (e.g. 24h and 2h)
+        * Prometheus-style metrics of bookings, availability checks and emails
+        * Staff timeline of the services over a day or week with capacity usage
+        * Opt-in sampling profiler of the booking requests and email crons
         
         This module handles all booking business logic.
         Requires om_service_master for master data.
     """,
     "author": "Truong Hiep",
     "website": "",
-    "depends": ["om_service_master", "mail", "calendar", "portal"],
+    "depends": ["om_service_master", "mail", "bus", "calendar", "portal"],
     "data": [
-        "security/ir.model.access.csv",
         "security/appointment_security.xml",
+        "security/ir.model.access.csv",
         "data/sequence_data.xml",
         "data/email_templates.xml",
         "data/cron_jobs.xml",
+        "views/booking_service_views.xml",
         "views/service_appointment_views.xml",
+        "views/service_appointment_archive_views.xml",
+        "views/service_profile_views.xml",
+        "views/res_config_settings_views.xml",
         "views/dashboard_views.xml",
         "views/menu_views.xml",
+        "wizard/service_utilization_report_views.xml",
+        "wizard/service_appointment_recurrence_views.xml",
     ],
+    "assets": {
+        "web.assets_backend": [
+            "om_service_operation/static/src/timeline/*",
+        ],
+    },
     "images": [],
     "license": "LGPL-3",
     "installable": True,
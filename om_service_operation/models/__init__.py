@@ -1,2 +1,11 @@
 # -*- coding: utf-8 -*-
+from . import booking_service
 from . import service_appointment
+from . import service_appointment_audit
+from . import service_appointment_archive
+from . import service_appointment_stat
+from . import service_appointment_hold
+from . import service_slot_lock
+from . import service_metric
+from . import service_profile
+from . import res_config_settings
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+
+
+class BookingService(models.Model):
+    _inherit = "booking.service"
+
+    reminder_offsets = fields.Char(
+        string="Reminders (Hours Before)",
+        default="24",
+        help="Comma-separated list of hours before the appointment at which a "
+        "reminder email is sent, e.g. 24, 2. Leave empty to send no reminder.",
+    )
+
+    def write(self, vals):
+        """Reschedule the next reminder of the upcoming confirmed appointments."""
+        result = super().write(vals)
+
+        if "reminder_offsets" in vals:
+            Appointment = self.env["service.appointment"].sudo()
+            upcoming = Appointment.search(
+                [
+                    ("service_id", "in", self.ids),
+                    ("state", "=", "confirmed"),
+                    ("booking_date", ">", fields.Datetime.now()),
+                ]
+            )
+            self.env.add_to_compute(Appointment._fields["reminder_due_at"], upcoming)
+
+        return result
+
+    @api.constrains("reminder_offsets")
+    def _check_reminder_offsets(self):
+        for service in self:
+            try:
+                offsets = service._get_reminder_offsets()
+            except ValueError:
+                raise ValidationError(
+                    _("Reminders must be a comma-separated list of hours, e.g. 24, 2.")
+                )
+            if any(offset <= 0 for offset in offsets):
+                raise ValidationError(_("Reminder offsets must be positive."))
+
+    def _get_reminder_offsets(self):
+        """Reminder offsets in hours, earliest reminder (largest offset) first."""
+        self.ensure_one()
+        offsets = {
+            float(part) for part in (self.reminder_offsets or "").split(",") if part.strip()
+        }
+        return sorted(offsets, reverse=True)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields
+
+
+class ResConfigSettings(models.TransientModel):
+    _inherit = "res.config.settings"
+
+    appointment_archive_days = fields.Integer(
+        string="Archive Appointments After (Days)",
+        config_parameter="om_service_operation.archive_after_days",
+        default=0,
+        help="Done and cancelled appointments that ended more than this many days "
+        "ago are moved to the archive. 0 disables archiving.",
+    )
+
+    appointment_archive_chatter = fields.Boolean(
+        string="Keep Chatter of Archived Appointments",
+        config_parameter="om_service_operation.archive_chatter",
+        help="Move messages and attachments to the archived appointment "
+        "instead of deleting them",
+    )
+
+    appointment_audit_log_mode = fields.Boolean(
+        string="Lightweight Audit Log",
+        config_parameter="om_service_operation.audit_log_mode",
+        help="Record status and field changes of appointments in a compact audit "
+        "table, and skip chatter messages, tracking and followers for website bookings",
+    )
+
+    appointment_slot_hold_minutes = fields.Integer(
+        string="Slot Hold (Minutes)",
+        config_parameter="om_service_operation.slot_hold_minutes",
+        default=10,
+        help="How long a time slot selected on the website stays reserved while "
+        "the customer fills in the booking form. 0 disables holds.",
+    )
+
+    appointment_metrics_token = fields.Char(
+        string="Metrics Token",
+        config_parameter="om_service_operation.metrics_token",
+        help="Bearer token expected by the /booking/metrics Prometheus endpoint. "
+        "Without it, only appointment managers can read the metrics.",
+    )
+
+    appointment_profiler_sample_rate = fields.Float(
+        string="Profiler Sample Rate",
+        config_parameter="om_service_operation.profiler_sample_rate",
+        default=0.0,
+        help="Fraction (0 to 1) of the website booking requests and email cron "
+        "runs whose Python stacks are sampled. 0 disables the profiler.",
+    )
@@ -1,11 +1,27 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from odoo.osv import expression
+from odoo.tools.sql import create_index, create_unique_index, escape_psql
 from datetime import timedelta
+from .service_appointment_audit import AUDITED_FIELDS
 import logging
 
 _logger = logging.getLogger(__name__)
 
+# Fields that move an appointment in the schedule (slots, daily statistics)
+SCHEDULE_FIELDS = {"state", "booking_date", "service_id"}
+
+# Services loaded per page by the staff timeline
+TIMELINE_PAGE_SIZE = 20
+
+# Context creating appointments without chatter log, tracking or followers
+AUDIT_ONLY_CONTEXT = {
+    "tracking_disable": True,
+    "mail_create_nolog": True,
+    "mail_create_nosubscribe": True,
+}
+
 
 class ServiceAppointment(models.Model):
     _name = "service.appointment"
@@ -97,8 +113,26 @@ class ServiceAppointment(models.Model):
     reminder_sent = fields.Boolean(
         string="Reminder Sent",
         default=False,
-        help="Indicates if 24-hour reminder email was sent",
+        help="Indicates if a reminder email was sent",
+        copy=False,
+    )
+
+    reminder_count = fields.Integer(
+        string="Reminders Sent",
+        default=0,
+        readonly=True,
+        copy=False,
+        help="Number of the service's reminder offsets already processed",
+    )
+
+    reminder_due_at = fields.Datetime(
+        string="Next Reminder",
+        compute="_compute_reminder_due_at",
+        store=True,
+        readonly=True,
+        index="btree_not_null",
         copy=False,
+        help="When the next reminder email is due; empty once all are processed",
     )
 
     completion_email_sent = fields.Boolean(
@@ -112,6 +146,82 @@ class ServiceAppointment(models.Model):
         string="Is Past Appointment", compute="_compute_is_past", store=False
     )
 
+    origin = fields.Selection(
+        [
+            ("backend", "Backend"),
+            ("website", "Website"),
+        ],
+        string="Origin",
+        default="backend",
+        readonly=True,
+        copy=False,
+        help="Channel the appointment was booked through",
+    )
+
+    series_origin_id = fields.Many2one(
+        "service.appointment",
+        string="Series Origin",
+        readonly=True,
+        copy=False,
+        index="btree_not_null",
+        ondelete="set null",
+        help="Appointment this occurrence of a recurring series was generated from",
+    )
+
+    series_count = fields.Integer(
+        string="Series Appointments",
+        compute="_compute_series_count",
+        help="Number of appointments generated from this one",
+    )
+
+    audit_ids = fields.One2many(
+        "service.appointment.audit",
+        "appointment_id",
+        string="History",
+        readonly=True,
+        help="Lightweight audit log of status and field changes",
+    )
+
+    def init(self):
+        """Index the per-service schedule scanned in booking date order,
+        the per-service intervals ending after a window start, and the
+        references (unique, usable by prefix searches)."""
+        create_index(
+            self.env.cr,
+            "service_appointment_service_booking_date_idx",
+            self._table,
+            ["service_id", "booking_date"],
+        )
+        create_index(
+            self.env.cr,
+            "service_appointment_service_interval_idx",
+            self._table,
+            ["service_id", "end_date", "booking_date"],
+        )
+
+        self.env.cr.execute(
+            """
+            SELECT reference
+              FROM service_appointment
+          GROUP BY reference
+            HAVING COUNT(*) > 1
+             LIMIT 1
+            """
+        )
+        duplicate = self.env.cr.fetchone()
+        if duplicate:
+            _logger.warning(
+                f"Appointment reference {duplicate[0]} is used more than once: "
+                f"unique index on service_appointment.reference not created"
+            )
+        else:
+            create_unique_index(
+                self.env.cr,
+                "service_appointment_reference_uniq",
+                self._table,
+                ["reference varchar_pattern_ops"],
+            )
+
     @api.depends("booking_date", "duration")
     def _compute_end_date(self):
         """Calculate end date based on booking date and duration."""
@@ -121,6 +231,63 @@ class ServiceAppointment(models.Model):
             else:
                 record.end_date = False
 
+    @api.depends("state", "booking_date", "reminder_count")
+    def _compute_reminder_due_at(self):
+        """Due time of the next reminder offset of confirmed appointments.
+
+        Not recomputed for every appointment of a service when its offsets
+        change: ``booking.service.write`` only recomputes the upcoming
+        confirmed ones. Appointments already started are never claimed.
+        """
+        for record in self:
+            offsets = record.service_id._get_reminder_offsets() if record.service_id else []
+            if (
+                record.state == "confirmed"
+                and record.booking_date
+                and record.reminder_count < len(offsets)
+            ):
+                record.reminder_due_at = record.booking_date - timedelta(
+                    hours=offsets[record.reminder_count]
+                )
+            else:
+                record.reminder_due_at = False
+
+    def _mark_reminder_sent(self):
+        """Advance past every reminder offset already due.
+
+        A single email is sent per cron pass, so an appointment confirmed
+        less than 2 hours ahead with offsets 24h and 2h gets one reminder,
+        not two.
+        """
+        now = fields.Datetime.now()
+        counts = {}
+        for record in self:
+            offsets = record.service_id._get_reminder_offsets()
+            passed = sum(
+                1
+                for offset in offsets
+                if record.booking_date - timedelta(hours=offset) <= now
+            )
+            counts.setdefault(max(passed, record.reminder_count + 1), []).append(
+                record.id
+            )
+
+        for count, ids in counts.items():
+            self.browse(ids).write({"reminder_count": count, "reminder_sent": True})
+
+    def _compute_series_count(self):
+        """Count the occurrences generated from each appointment."""
+        counts = {
+            origin.id: count
+            for origin, count in self.env["service.appointment"]._read_group(
+                [("series_origin_id", "in", self.ids)],
+                ["series_origin_id"],
+                ["__count"],
+            )
+        }
+        for record in self:
+            record.series_count = counts.get(record.id, 0)
+
     @api.depends("booking_date")
     def _compute_is_past(self):
         """Check if appointment is in the past."""
@@ -128,7 +295,9 @@ class ServiceAppointment(models.Model):
         for record in self:
             record.is_past = record.booking_date < now if record.booking_date else False
 
-    def check_overlap(self, booking_date, end_date, service_id, exclude_id=None):
+    def check_overlap(
+        self, booking_date, end_date, service_id, exclude_id=None, exclude_hold=None
+    ):
         if not booking_date or not end_date:
             return (False, None, None)
 
@@ -144,8 +313,52 @@ class ServiceAppointment(models.Model):
             booking_date=booking_date,
             end_date=end_date,
             exclude_id=exclude_id,
+            exclude_hold=exclude_hold,
+        )
+
+    @api.model
+    def get_timeline_window(self, start, end, offset=0, limit=TIMELINE_PAGE_SIZE):
+        """One page of services of the staff timeline over ``[start, end)``.
+
+        Called by the timeline client action for the visible day or week,
+        and again with the next ``offset`` as the list is scrolled. Bounds
+        are UTC datetime strings.
+
+        Returns ``{"services": [...], "has_more": bool}``, each service with
+        its appointments and capacity segments in the window.
+        """
+        start = fields.Datetime.to_datetime(start)
+        end = fields.Datetime.to_datetime(end)
+
+        services = self.env["booking.service"].search_fetch(
+            [],
+            ["name", "max_concurrent_bookings"],
+            offset=offset,
+            limit=limit + 1,
+            order="name, id",
+        )
+        has_more = len(services) > limit
+        services = services[:limit]
+
+        from odoo.addons.om_service_operation.services.appointment_service import (
+            AppointmentService,
         )
 
+        window = AppointmentService(self.env).get_schedule_window(services, start, end)
+
+        return {
+            "services": [
+                dict(
+                    window[service.id],
+                    id=service.id,
+                    name=service.name,
+                    max_concurrent_bookings=service.max_concurrent_bookings,
+                )
+                for service in services
+            ],
+            "has_more": has_more,
+        }
+
     @api.constrains("booking_date")
     def _check_past_date(self):
         for record in self:
@@ -157,6 +370,50 @@ class ServiceAppointment(models.Model):
                     )
                 )
 
+    @api.constrains("booking_date", "service_id", "state")
+    def _check_capacity(self):
+        """Keep concurrent appointments within ``max_concurrent_bookings``.
+
+        Validates the whole created or written recordset at once (one
+        interval query per service), whatever the channel: backend, import
+        or RPC. Appointments that already ended are not checked again.
+        Concurrent bookings of a service are serialized on the service row.
+        """
+        from odoo.addons.om_service_operation.services.appointment_service import (
+            AppointmentService,
+        )
+
+        now = fields.Datetime.now()
+        appointments = self.filtered(
+            lambda record: record.state != "cancel"
+            and record.booking_date
+            and record.end_date
+            and record.end_date > now
+        )
+        if not appointments:
+            return
+
+        conflicts = AppointmentService(self.env).find_capacity_conflicts(appointments)
+        if conflicts:
+            raise ValidationError(
+                _("Time slot fully booked!\n\n")
+                + "\n".join(
+                    _('Service "%s": %d/%d bookings from %s to %s')
+                    % (
+                        service.name,
+                        bookings,
+                        service.max_concurrent_bookings,
+                        fields.Datetime.context_timestamp(self, start).strftime(
+                            "%Y-%m-%d %H:%M"
+                        ),
+                        fields.Datetime.context_timestamp(self, end).strftime(
+                            "%Y-%m-%d %H:%M"
+                        ),
+                    )
+                    for service, start, end, bookings in conflicts[:5]
+                )
+            )
+
     # CRUD Overrides
     @api.model_create_multi
     def create(self, vals_list):
@@ -167,16 +424,156 @@ class ServiceAppointment(models.Model):
                     self.env["ir.sequence"].next_by_code("service.appointment") or "New"
                 )
 
-        records = super(ServiceAppointment, self).create(vals_list)
+        Audit = self.env["service.appointment.audit"].sudo()
+        audit_mode = Audit._is_enabled()
+
+        if audit_mode and all(vals.get("origin") == "website" for vals in vals_list):
+            records = super(
+                ServiceAppointment, self.with_context(**AUDIT_ONLY_CONTEXT)
+            ).create(vals_list)
+            records = records.with_env(self.env)
+        else:
+            records = super(ServiceAppointment, self).create(vals_list)
 
         for record in records:
-            record.message_post(
+            record._post_chatter(
                 body=_("Appointment created for %s") % record.service_id.name,
                 subject=_("New Appointment"),
             )
 
+        if audit_mode:
+            Audit._log_creations(records)
+
+        records._notify_slot_changes({}, records._get_slot_payloads(1))
+
+        Stat = self.env["service.appointment.stat"].sudo()
+        Stat._apply_deltas(Stat._get_deltas(records, 1))
+
         return records
 
+    def write(self, vals):
+        """Override write to keep slot listeners, statistics and audit log in sync."""
+        if "booking_date" in vals and "reminder_count" not in vals:
+            # Rescheduled appointments get their reminders again
+            vals = dict(vals, reminder_count=0, reminder_sent=False)
+
+        Audit = self.env["service.appointment.audit"].sudo()
+        audited = [fname for fname in AUDITED_FIELDS if fname in vals]
+        if audited and Audit._is_enabled():
+            audit_before = Audit._snapshot(self, audited)
+        else:
+            audit_before = None
+
+        if not SCHEDULE_FIELDS & set(vals):
+            result = super().write(vals)
+        else:
+            Stat = self.env["service.appointment.stat"].sudo()
+            released = self._get_slot_payloads(-1)
+            stats_before = Stat._get_deltas(self, -1)
+
+            result = super().write(vals)
+
+            self._notify_slot_changes(released, self._get_slot_payloads(1))
+            Stat._apply_deltas(stats_before, Stat._get_deltas(self, 1))
+
+        if audit_before is not None:
+            Audit._log_changes(audit_before, Audit._snapshot(self, audited))
+
+        return result
+
+    def unlink(self):
+        """Override unlink to release slots and statistics of deleted appointments."""
+        if self.env.context.get("appointment_archiving"):
+            # Archived appointments keep counting in the statistics
+            return super().unlink()
+
+        Stat = self.env["service.appointment.stat"].sudo()
+        released = self._get_slot_payloads(-1)
+        stats_before = Stat._get_deltas(self, -1)
+
+        result = super().unlink()
+
+        self._notify_slot_changes(released, {})
+        Stat._apply_deltas(stats_before)
+
+        return result
+
+    def _get_audit_only(self):
+        """Records logged in the audit table only, without chatter or tracking.
+
+        Applies to website bookings when the audit log mode is enabled.
+        """
+        if not self.env["service.appointment.audit"].sudo()._is_enabled():
+            return self.browse()
+        return self.filtered(lambda record: record.origin == "website")
+
+    def _post_chatter(self, body, subject):
+        """Post on the chatter of records that are not audit-log only."""
+        for record in self - self._get_audit_only():
+            record.message_post(body=body, subject=subject)
+
+    def _track_prepare(self, fields_iter):
+        """Skip chatter tracking of audit-log only records."""
+        return super(
+            ServiceAppointment, self - self._get_audit_only()
+        )._track_prepare(fields_iter)
+
+    def _prepare_archive_values(self):
+        """Values of the service.appointment.archive rows replacing these records."""
+        return [
+            {
+                "original_id": record.id,
+                "reference": record.reference,
+                "customer_id": record.customer_id.id,
+                "service_id": record.service_id.id,
+                "booking_date": record.booking_date,
+                "end_date": record.end_date,
+                "duration": record.duration,
+                "price": record.price,
+                "currency_id": record.currency_id.id,
+                "state": record.state,
+                "notes": record.notes,
+                "booked_on": record.create_date,
+            }
+            for record in self
+        ]
+
+    def _get_slot_payloads(self, delta):
+        """Map record id to its slot occupancy delta (occupying records only)."""
+        from odoo.addons.om_service_operation.services.appointment_service import (
+            AppointmentService,
+        )
+
+        appointment_service = AppointmentService(self.env)
+        payloads = {}
+        for record in self:
+            payload = appointment_service.get_slot_payload(record, delta)
+            if payload:
+                payloads[record.id] = payload
+        return payloads
+
+    def _notify_slot_changes(self, released, taken):
+        """Send deltas for records whose occupied slot actually changed."""
+        from odoo.addons.om_service_operation.services.appointment_service import (
+            AppointmentService,
+        )
+
+        def slot_key(payload):
+            return (payload["service_id"], payload["start"], payload["end"])
+
+        payloads = []
+        for record_id, payload in released.items():
+            if record_id not in taken or slot_key(taken[record_id]) != slot_key(payload):
+                payloads.append(payload)
+        for record_id, payload in taken.items():
+            if record_id not in released or slot_key(released[record_id]) != slot_key(
+                payload
+            ):
+                payloads.append(payload)
+
+        if payloads:
+            AppointmentService(self.env).notify_slot_changes(payloads)
+
     def action_confirm(self):
         """Confirm the appointment."""
         for record in self:
@@ -184,7 +581,7 @@ class ServiceAppointment(models.Model):
                 continue
 
             record.write({"state": "confirmed"})
-            record.message_post(
+            record._post_chatter(
                 body=_("Appointment confirmed"), subject=_("Appointment Confirmed")
             )
 
@@ -195,7 +592,7 @@ class ServiceAppointment(models.Model):
                 continue
 
             record.write({"state": "done"})
-            record.message_post(
+            record._post_chatter(
                 body=_("Appointment completed"), subject=_("Appointment Completed")
             )
 
@@ -214,6 +611,30 @@ class ServiceAppointment(models.Model):
                     f"Failed to send completion email for {record.reference}: {str(e)}"
                 )
 
+    def action_open_recurrence(self):
+        """Open the wizard repeating this appointment as a series."""
+        self.ensure_one()
+        return {
+            "name": _("Repeat Appointment"),
+            "type": "ir.actions.act_window",
+            "res_model": "service.appointment.recurrence",
+            "view_mode": "form",
+            "target": "new",
+            "context": {"default_appointment_id": self.id},
+        }
+
+    def action_view_series(self):
+        """Open this appointment and the occurrences generated from it."""
+        self.ensure_one()
+        return {
+            "name": _("Recurring Series"),
+            "type": "ir.actions.act_window",
+            "res_model": "service.appointment",
+            "view_mode": "list,calendar,form",
+            "domain": ["|", ("id", "=", self.id), ("series_origin_id", "=", self.id)],
+            "context": {"create": False},
+        }
+
     def action_cancel(self):
         """Cancel the appointment."""
         for record in self:
@@ -221,31 +642,39 @@ class ServiceAppointment(models.Model):
                 continue
 
             record.write({"state": "cancel"})
-            record.message_post(
+            record._post_chatter(
                 body=_("Appointment cancelled"), subject=_("Appointment Cancelled")
             )
 
     def _cron_send_reminders(self):
         """Cron job to send appointment reminder emails."""
         from odoo.addons.om_service_operation.services.email_service import EmailService
+        from odoo.addons.om_service_operation.services.profiler_service import (
+            ProfilerService,
+        )
 
         email_service = EmailService(self.env)
-        count = email_service.send_reminder_emails()
+        with ProfilerService(self.env).profile("cron:send_reminders"):
+            count = email_service.send_reminder_emails(commit=True)
         _logger.info(f"Cron: Sent {count} reminder emails")
 
     def _cron_send_completions(self):
         """Cron job to send completion notification emails."""
         from odoo.addons.om_service_operation.services.email_service import EmailService
+        from odoo.addons.om_service_operation.services.profiler_service import (
+            ProfilerService,
+        )
 
         email_service = EmailService(self.env)
-        count = email_service.send_completion_notifications_batch()
+        with ProfilerService(self.env).profile("cron:send_completions"):
+            count = email_service.send_completion_notifications_batch(commit=True)
         _logger.info(f"Cron: Sent {count} completion emails")
 
     def action_set_to_draft(self):
         """Reset appointment to draft."""
         for record in self:
             record.write({"state": "draft"})
-            record.message_post(
+            record._post_chatter(
                 body=_("Appointment reset to draft"), subject=_("Appointment Reset")
             )
 
@@ -264,10 +693,60 @@ class ServiceAppointment(models.Model):
             "target": "self",
         }
 
-    def name_get(self):
-        """Custom name display."""
-        result = []
+    @api.depends("reference", "customer_id.name", "service_id.name")
+    def _compute_display_name(self):
+        """Display "reference - customer - service".
+
+        Partners and services are fetched once for the whole recordset
+        instead of record by record.
+        """
+        saved = self.filtered("id")
+        saved.fetch(["reference", "customer_id", "service_id"])
+        saved.customer_id.fetch(["name"])
+        saved.service_id.fetch(["name"])
+
         for record in self:
-            name = f"{record.reference} - {record.customer_id.name} - {record.service_id.name}"
-            result.append((record.id, name))
-        return result
+            record.display_name = (
+                f"{record.reference} - {record.customer_id.name} - {record.service_id.name}"
+            )
+
+    @api.model
+    def _name_search(
+        self, name, domain=None, operator="ilike", limit=None, order=None
+    ):
+        """Match reference prefixes first, then customer and service names.
+
+        The reference prefix is a range scan of the unique reference index;
+        customer and service names are only searched to fill the remaining
+        places.
+        """
+        if not name or operator not in ("ilike", "like"):
+            return super()._name_search(name, domain, operator, limit, order)
+
+        domain = domain or []
+        # References are generated upper case (BOOK/YYYY/NNNN)
+        prefixes = {f"{escape_psql(name)}%", f"{escape_psql(name.upper())}%"}
+        reference_domain = expression.OR(
+            [[("reference", "=like", prefix)] for prefix in prefixes]
+        )
+        ids = list(
+            self._search(
+                expression.AND([domain, reference_domain]), limit=limit, order=order
+            )
+        )
+
+        if limit is None or len(ids) < limit:
+            name_domain = [
+                "|",
+                ("customer_id.name", operator, name),
+                ("service_id.name", operator, name),
+            ]
+            ids += list(
+                self._search(
+                    expression.AND([domain, [("id", "not in", ids)], name_domain]),
+                    limit=limit - len(ids) if limit else None,
+                    order=order,
+                )
+            )
+
+        return ids
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+from odoo.tools import str2bool
+from psycopg2.extras import execute_values
+from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+ARCHIVE_BATCH_SIZE = 5000
+
+
+class ServiceAppointmentArchive(models.Model):
+    _name = "service.appointment.archive"
+    _description = "Archived Service Appointment"
+    _inherit = ["mail.thread", "portal.mixin"]
+    _order = "booking_date desc, id desc"
+    _rec_name = "reference"
+
+    original_id = fields.Integer(
+        string="Original ID",
+        readonly=True,
+        index=True,
+        help="ID the appointment had before it was archived",
+    )
+
+    reference = fields.Char(string="Appointment Reference", readonly=True, index=True)
+
+    customer_id = fields.Many2one(
+        "res.partner", string="Customer", readonly=True, index=True
+    )
+
+    service_id = fields.Many2one("booking.service", string="Service", readonly=True)
+
+    booking_date = fields.Datetime(string="Start Date & Time", readonly=True)
+
+    end_date = fields.Datetime(string="End Date & Time", readonly=True)
+
+    duration = fields.Float(string="Duration (Hours)", readonly=True)
+
+    price = fields.Monetary(string="Service Price", readonly=True)
+
+    currency_id = fields.Many2one("res.currency", string="Currency", readonly=True)
+
+    state = fields.Selection(
+        [
+            ("draft", "Draft"),
+            ("confirmed", "Confirmed"),
+            ("done", "Done"),
+            ("cancel", "Cancelled"),
+        ],
+        string="Status",
+        readonly=True,
+    )
+
+    notes = fields.Text(string="Notes", readonly=True)
+
+    booked_on = fields.Datetime(
+        string="Booked On", readonly=True, help="When the appointment was created"
+    )
+
+    archived_on = fields.Datetime(
+        string="Archived On", readonly=True, default=fields.Datetime.now
+    )
+
+    audit_ids = fields.One2many(
+        "service.appointment.audit",
+        "archive_id",
+        string="History",
+        readonly=True,
+        help="Audit log of the appointment before it was archived",
+    )
+
+    def _compute_access_url(self):
+        """Compute portal access URL."""
+        super()._compute_access_url()
+        for archive in self:
+            archive.access_url = "/my/appointments/archive/%s" % archive.id
+
+    @api.model
+    def _get_archive_settings(self):
+        """Return ``(horizon in days, keep chatter)`` from system parameters."""
+        ICP = self.env["ir.config_parameter"].sudo()
+        days = int(ICP.get_param("om_service_operation.archive_after_days", 0) or 0)
+        keep_chatter = str2bool(
+            ICP.get_param("om_service_operation.archive_chatter", "False")
+        )
+        return days, keep_chatter
+
+    @api.model
+    def _archive_appointments(self, limit=ARCHIVE_BATCH_SIZE):
+        """Move one batch of finished appointments past the horizon to the archive.
+
+        Returns the number of archived appointments.
+        """
+        days, keep_chatter = self._get_archive_settings()
+        if days <= 0:
+            return 0
+
+        horizon = fields.Datetime.now() - timedelta(days=days)
+        appointments = (
+            self.env["service.appointment"]
+            .sudo()
+            .search(
+                [("state", "in", ["done", "cancel"]), ("end_date", "<", horizon)],
+                order="end_date, id",
+                limit=limit,
+            )
+        )
+        if not appointments:
+            return 0
+
+        archives = (
+            self.sudo()
+            .with_context(
+                tracking_disable=True,
+                mail_create_nolog=True,
+                mail_create_nosubscribe=True,
+            )
+            .create(appointments._prepare_archive_values())
+        )
+
+        if keep_chatter:
+            self._move_chatter(appointments, archives)
+        self._move_audit(appointments, archives)
+
+        appointments.with_context(appointment_archiving=True).unlink()
+
+        return len(appointments)
+
+    @api.model
+    def _move_chatter(self, appointments, archives):
+        """Re-point messages and attachments of appointments to their archives."""
+        self.env.flush_all()
+        mapping = list(zip(appointments.ids, archives.ids))
+
+        execute_values(
+            self.env.cr._obj,
+            """
+            UPDATE mail_message m
+               SET model = 'service.appointment.archive', res_id = v.archive_id
+              FROM (VALUES %s) AS v(appointment_id, archive_id)
+             WHERE m.model = 'service.appointment'
+               AND m.res_id = v.appointment_id
+            """,
+            mapping,
+        )
+        execute_values(
+            self.env.cr._obj,
+            """
+            UPDATE ir_attachment a
+               SET res_model = 'service.appointment.archive', res_id = v.archive_id
+              FROM (VALUES %s) AS v(appointment_id, archive_id)
+             WHERE a.res_model = 'service.appointment'
+               AND a.res_id = v.appointment_id
+            """,
+            mapping,
+        )
+
+        self.env["mail.message"].invalidate_model(["model", "res_id"])
+        self.env["ir.attachment"].invalidate_model(["res_model", "res_id"])
+
+    @api.model
+    def _move_audit(self, appointments, archives):
+        """Re-point the audit log of appointments to their archives.
+
+        The log is append-only, so it is always kept: deleting the
+        appointments then only clears ``appointment_id``.
+        """
+        self.env["service.appointment.audit"].flush_model()
+        execute_values(
+            self.env.cr._obj,
+            """
+            UPDATE service_appointment_audit l
+               SET archive_id = v.archive_id
+              FROM (VALUES %s) AS v(appointment_id, archive_id)
+             WHERE l.appointment_id = v.appointment_id
+            """,
+            list(zip(appointments.ids, archives.ids)),
+        )
+        self.env["service.appointment.audit"].invalidate_model(["archive_id"])
+
+    def _cron_archive_appointments(self):
+        """Cron job to archive finished appointments older than the horizon."""
+        count = self._archive_appointments()
+        _logger.info(f"Cron: Archived {count} appointments")
+
+        if count >= ARCHIVE_BATCH_SIZE:
+            # More to do: run again right away instead of waiting a day
+            self.env.ref(
+                "om_service_operation.cron_archive_appointments"
+            )._trigger()
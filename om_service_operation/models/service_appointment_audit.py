@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools import str2bool
+from psycopg2.extras import execute_values
+
+# Fields whose changes are appended to the audit log. The bookkeeping of
+# the email crons (reminder_count, reminder_sent, completion_email_sent) is
+# not audited. Raw SQL updates bypass ``write`` and log through ``_log``.
+AUDITED_FIELDS = ("customer_id", "service_id", "booking_date", "state")
+
+
+class ServiceAppointmentAudit(models.Model):
+    _name = "service.appointment.audit"
+    _description = "Appointment Audit Log"
+    _order = "date desc, id desc"
+    _log_access = False
+
+    original_id = fields.Integer(
+        string="Appointment ID",
+        readonly=True,
+        index=True,
+        help="ID of the appointment, kept once it is archived or deleted",
+    )
+
+    appointment_id = fields.Many2one(
+        "service.appointment",
+        string="Appointment",
+        readonly=True,
+        index=True,
+        ondelete="set null",
+    )
+
+    archive_id = fields.Many2one(
+        "service.appointment.archive",
+        string="Archived Appointment",
+        readonly=True,
+        index="btree_not_null",
+        ondelete="set null",
+        help="Archive the appointment was moved to",
+    )
+
+    date = fields.Datetime(string="Date", required=True, readonly=True)
+
+    user_id = fields.Many2one("res.users", string="User", readonly=True)
+
+    event = fields.Selection(
+        [
+            ("create", "Created"),
+            ("write", "Changed"),
+        ],
+        string="Event",
+        required=True,
+        readonly=True,
+    )
+
+    field_name = fields.Char(string="Field", readonly=True)
+
+    old_value = fields.Char(string="Old Value", readonly=True)
+
+    new_value = fields.Char(string="New Value", readonly=True)
+
+    def init(self):
+        """Keep the appointment id of the rows logged before ``original_id``."""
+        self.env.cr.execute(
+            """
+            UPDATE service_appointment_audit
+               SET original_id = appointment_id
+             WHERE original_id IS NULL
+               AND appointment_id IS NOT NULL
+            """
+        )
+
+    @api.model
+    def _is_enabled(self):
+        """Whether the lightweight audit log mode is switched on."""
+        return str2bool(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("om_service_operation.audit_log_mode", "False")
+        )
+
+    @api.model
+    def _snapshot(self, appointments, fnames):
+        """Return {appointment id: {field: display value}} for ``fnames``."""
+        return {
+            appointment.id: {
+                fname: self._format_value(appointment, fname) for fname in fnames
+            }
+            for appointment in appointments
+        }
+
+    @api.model
+    def _format_value(self, appointment, fname):
+        value = appointment[fname]
+        field = appointment._fields[fname]
+
+        if field.type == "many2one":
+            return value.display_name or ""
+        if field.type == "datetime":
+            return fields.Datetime.to_string(value) or ""
+        return str(value) if value else ""
+
+    @api.model
+    def _log_creations(self, appointments):
+        """Append one event per created appointment."""
+        self._log(
+            [
+                (appointment.id, "create", "state", "", appointment.state)
+                for appointment in appointments
+            ]
+        )
+
+    @api.model
+    def _log_changes(self, before, after):
+        """Append one event per field whose value differs between snapshots."""
+        rows = []
+        for appointment_id, old_values in before.items():
+            new_values = after.get(appointment_id, {})
+            for fname, old_value in old_values.items():
+                new_value = new_values.get(fname, "")
+                if old_value != new_value:
+                    rows.append((appointment_id, "write", fname, old_value, new_value))
+        self._log(rows)
+
+    @api.model
+    def _log(self, rows):
+        """Batch-insert ``(appointment_id, event, field, old, new)`` rows."""
+        if not rows:
+            return
+
+        now = fields.Datetime.now()
+        execute_values(
+            self.env.cr._obj,
+            """
+            INSERT INTO service_appointment_audit
+                (original_id, appointment_id, date, user_id, event, field_name,
+                 old_value, new_value)
+            VALUES %s
+            """,
+            [(row[0], row[0], now, self.env.uid) + row[1:] for row in rows],
+        )
+        self.invalidate_model()
+        self.env["service.appointment"].invalidate_model(["audit_ids"])
+
+    def write(self, vals):
+        raise UserError(_("Audit log entries cannot be modified."))
+
+    def unlink(self):
+        raise UserError(_("Audit log entries cannot be deleted."))
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+from datetime import timedelta
+import logging
+import secrets
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_HOLD_MINUTES = 10
+
+# Active holds a single client (IP address) may have at once
+MAX_HOLDS_PER_CLIENT = 3
+
+
+class ServiceAppointmentHold(models.Model):
+    _name = "service.appointment.hold"
+    _description = "Appointment Slot Hold"
+    _order = "expires_at"
+    _rec_name = "token"
+    _log_access = False
+
+    token = fields.Char(
+        string="Token",
+        required=True,
+        readonly=True,
+        copy=False,
+        default=lambda self: secrets.token_urlsafe(16),
+    )
+
+    service_id = fields.Many2one(
+        "booking.service",
+        string="Service",
+        required=True,
+        readonly=True,
+        ondelete="cascade",
+    )
+
+    booking_date = fields.Datetime(string="Start Date & Time", required=True, readonly=True)
+
+    end_date = fields.Datetime(string="End Date & Time", required=True, readonly=True)
+
+    expires_at = fields.Datetime(
+        string="Expires At", required=True, readonly=True, index=True
+    )
+
+    client_ip = fields.Char(
+        string="Client IP",
+        readonly=True,
+        index="btree_not_null",
+        help="Address of the website visitor who took the hold",
+    )
+
+    _sql_constraints = [
+        ("token_uniq", "unique(token)", "Hold tokens must be unique."),
+    ]
+
+    @api.model
+    def _get_hold_minutes(self):
+        """How long a selected slot stays reserved for the customer."""
+        return int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("om_service_operation.slot_hold_minutes", DEFAULT_HOLD_MINUTES)
+            or 0
+        )
+
+    @api.model
+    def _hold_slot(
+        self, service, booking_date, end_date, previous_token=None, client_ip=None
+    ):
+        """Reserve ``[booking_date, end_date]`` of ``service`` for a short while.
+
+        The customer's previous hold (if any) is released first, and a
+        client may hold at most ``MAX_HOLDS_PER_CLIENT`` slots at once. Holds and
+        bookings of overlapping intervals are serialized by
+        ``AppointmentService.lock_slots``, so two customers cannot both
+        take the last free place. Raises ValidationError when the slot is
+        no longer available.
+        """
+        from odoo.addons.om_service_operation.services.appointment_service import (
+            AppointmentService,
+        )
+
+        minutes = self._get_hold_minutes()
+        if minutes <= 0:
+            return self.browse()
+
+        AppointmentService(self.env).lock_slots([(service, booking_date, end_date)])
+
+        if previous_token:
+            self._get_active_hold(previous_token)._release()
+
+        client_holds = (
+            self.sudo().search_count(
+                [
+                    ("client_ip", "=", client_ip),
+                    ("expires_at", ">", fields.Datetime.now()),
+                ]
+            )
+            if client_ip
+            else 0
+        )
+        if client_holds >= MAX_HOLDS_PER_CLIENT:
+            raise ValidationError(
+                _(
+                    "Too many time slots are held at once. "
+                    "Please complete or abandon a booking first."
+                )
+            )
+
+        has_overlap, _overlapping, error_msg = AppointmentService(
+            self.env
+        ).check_availability(service, booking_date, end_date)
+        if has_overlap:
+            raise ValidationError(error_msg)
+
+        hold = self.sudo().create(
+            {
+                "service_id": service.id,
+                "booking_date": booking_date,
+                "end_date": end_date,
+                "expires_at": fields.Datetime.now() + timedelta(minutes=minutes),
+                "client_ip": client_ip,
+            }
+        )
+        AppointmentService(self.env).notify_slot_changes(hold._get_slot_payloads(1))
+
+        return hold
+
+    @api.model
+    def _get_active_hold(self, token, service=None, booking_date=None):
+        """Return the unexpired hold of ``token``, optionally for a given slot."""
+        if not token:
+            return self.browse()
+
+        domain = [("token", "=", token), ("expires_at", ">", fields.Datetime.now())]
+        if service:
+            domain.append(("service_id", "=", service.id))
+        if booking_date:
+            domain.append(("booking_date", "=", booking_date))
+
+        return self.sudo().search(domain, limit=1)
+
+    def _get_slot_payloads(self, delta):
+        """Occupancy deltas of these holds, in the appointment bus format."""
+        return [
+            {
+                "service_id": hold.service_id.id,
+                "start": fields.Datetime.to_string(hold.booking_date),
+                "end": fields.Datetime.to_string(hold.end_date),
+                "delta": delta,
+                "hold_id": hold.id,
+            }
+            for hold in self
+        ]
+
+    def _release(self):
+        """Give the held slots back, e.g. once converted into an appointment."""
+        if not self:
+            return
+
+        from odoo.addons.om_service_operation.services.appointment_service import (
+            AppointmentService,
+        )
+
+        payloads = self._get_slot_payloads(-1)
+        self.sudo().unlink()
+        AppointmentService(self.env).notify_slot_changes(payloads)
+
+    @api.model
+    def _expire_holds(self):
+        """Delete all expired holds in one statement and free their slots."""
+        from odoo.addons.om_service_operation.services.appointment_service import (
+            AppointmentService,
+        )
+
+        self.flush_model()
+        self.env.cr.execute(
+            """
+            DELETE FROM service_appointment_hold
+             WHERE expires_at <= now() at time zone 'UTC'
+         RETURNING id, service_id, booking_date, end_date
+            """
+        )
+        rows = self.env.cr.fetchall()
+        self.invalidate_model()
+
+        AppointmentService(self.env).notify_slot_changes(
+            [
+                {
+                    "service_id": service_id,
+                    "start": fields.Datetime.to_string(start),
+                    "end": fields.Datetime.to_string(end),
+                    "delta": -1,
+                    "hold_id": hold_id,
+                }
+                for hold_id, service_id, start, end in rows
+            ]
+        )
+
+        return len(rows)
+
+    def _cron_expire_holds(self):
+        """Cron job to free abandoned holds and purge past slot locks."""
+        count = self._expire_holds()
+        purged = self.env["service.slot.lock"]._purge_past()
+        _logger.info(f"Cron: Expired {count} slot holds, purged {purged} slot locks")
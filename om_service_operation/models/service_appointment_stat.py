@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+from psycopg2.extras import execute_values
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class ServiceAppointmentStat(models.Model):
+    _name = "service.appointment.stat"
+    _description = "Daily Booking Statistics"
+    _order = "date desc, service_id"
+    _rec_name = "date"
+
+    date = fields.Date(
+        string="Date",
+        required=True,
+        readonly=True,
+        index=True,
+        help="Booking day (UTC) the figures are aggregated on",
+    )
+
+    service_id = fields.Many2one(
+        "booking.service",
+        string="Service",
+        required=True,
+        readonly=True,
+        ondelete="cascade",
+    )
+
+    state = fields.Selection(
+        [
+            ("draft", "Draft"),
+            ("confirmed", "Confirmed"),
+            ("done", "Done"),
+            ("cancel", "Cancelled"),
+        ],
+        string="Status",
+        required=True,
+        readonly=True,
+    )
+
+    appointment_count = fields.Integer(string="Appointments", readonly=True)
+
+    booked_hours = fields.Float(string="Booked Hours", readonly=True)
+
+    revenue = fields.Monetary(
+        string="Revenue", currency_field="currency_id", readonly=True
+    )
+
+    currency_id = fields.Many2one("res.currency", string="Currency", readonly=True)
+
+    _sql_constraints = [
+        (
+            "date_service_state_uniq",
+            "unique(date, service_id, state)",
+            "Statistics are kept once per day, service and status.",
+        ),
+    ]
+
+    def init(self):
+        """Build the statistics for appointments that existed before install.
+
+        Only while the table is empty: on updates, the daily cron keeps the
+        statistics aligned.
+        """
+        self.env.cr.execute("SELECT 1 FROM service_appointment_stat LIMIT 1")
+        if not self.env.cr.fetchone():
+            self._reconcile()
+
+    @api.model
+    def _get_deltas(self, appointments, sign):
+        """Aggregate appointments into {(date, service, state): [currency, count, hours, revenue]}."""
+        deltas = {}
+        for appointment in appointments:
+            if not appointment.booking_date or not appointment.service_id:
+                continue
+
+            key = (
+                appointment.booking_date.date(),
+                appointment.service_id.id,
+                appointment.state,
+            )
+            delta = deltas.setdefault(
+                key, [appointment.service_id.currency_id.id, 0, 0.0, 0.0]
+            )
+            delta[1] += sign
+            delta[2] += sign * (appointment.duration or 0.0)
+            delta[3] += sign * (appointment.price or 0.0)
+        return deltas
+
+    @api.model
+    def _apply_deltas(self, *deltas_list):
+        """Upsert the summed deltas in one statement."""
+        totals = {}
+        for deltas in deltas_list:
+            for key, (currency_id, count, hours, revenue) in deltas.items():
+                total = totals.setdefault(key, [currency_id, 0, 0.0, 0.0])
+                total[1] += count
+                total[2] += hours
+                total[3] += revenue
+
+        rows = [
+            (day, service_id, state, currency_id, count, hours, revenue, self.env.uid)
+            for (day, service_id, state), (currency_id, count, hours, revenue) in totals.items()
+            if count or hours or revenue
+        ]
+        if not rows:
+            return
+
+        self.flush_model()
+        execute_values(
+            self.env.cr._obj,
+            """
+            INSERT INTO service_appointment_stat
+                (date, service_id, state, currency_id, appointment_count,
+                 booked_hours, revenue, create_uid, create_date, write_uid, write_date)
+            SELECT v.date, v.service_id, v.state, v.currency_id, v.count, v.hours,
+                   v.revenue, v.uid, now() at time zone 'UTC', v.uid, now() at time zone 'UTC'
+              FROM (VALUES %s) AS v(date, service_id, state, currency_id, count, hours, revenue, uid)
+            ON CONFLICT (date, service_id, state) DO UPDATE SET
+                appointment_count = service_appointment_stat.appointment_count + EXCLUDED.appointment_count,
+                booked_hours = service_appointment_stat.booked_hours + EXCLUDED.booked_hours,
+                revenue = service_appointment_stat.revenue + EXCLUDED.revenue,
+                write_uid = EXCLUDED.write_uid,
+                write_date = EXCLUDED.write_date
+            """,
+            rows,
+            template="(%s::date, %s, %s, %s, %s, %s::float, %s::numeric, %s)",
+        )
+        self.invalidate_model()
+
+    @api.model
+    def _reconcile(self):
+        """Align all statistics with the live and archived appointments.
+
+        Recomputed rows that differ are upserted and rows without any
+        appointment left are deleted, without locking the table: a
+        concurrent ``_apply_deltas`` on the same row makes one of the two
+        transactions fail with a serialization error and be retried.
+
+        Returns ``(rows upserted, rows deleted)``.
+        """
+        self.env["service.appointment"].flush_model()
+        self.env["service.appointment.archive"].flush_model()
+        self.flush_model()
+        self.env.cr.execute(
+            """
+            WITH fresh AS (
+                SELECT a.booking_date::date AS date, a.service_id, a.state,
+                       s.currency_id, COUNT(*) AS count,
+                       SUM(COALESCE(a.duration, 0)) AS hours,
+                       SUM(COALESCE(a.price, 0)) AS revenue
+                  FROM (
+                        SELECT booking_date, service_id, state, duration, price
+                          FROM service_appointment
+                     UNION ALL
+                        SELECT booking_date, service_id, state, duration, price
+                          FROM service_appointment_archive
+                       ) a
+                  JOIN booking_service s ON s.id = a.service_id
+                 WHERE a.booking_date IS NOT NULL
+              GROUP BY a.booking_date::date, a.service_id, a.state, s.currency_id
+            ), upserted AS (
+                INSERT INTO service_appointment_stat
+                    (date, service_id, state, currency_id, appointment_count,
+                     booked_hours, revenue, create_uid, create_date, write_uid, write_date)
+                SELECT date, service_id, state, currency_id, count, hours, revenue,
+                       %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+                  FROM fresh
+                ON CONFLICT (date, service_id, state) DO UPDATE SET
+                    currency_id = EXCLUDED.currency_id,
+                    appointment_count = EXCLUDED.appointment_count,
+                    booked_hours = EXCLUDED.booked_hours,
+                    revenue = EXCLUDED.revenue,
+                    write_uid = EXCLUDED.write_uid,
+                    write_date = EXCLUDED.write_date
+                 WHERE (service_appointment_stat.currency_id,
+                        service_appointment_stat.appointment_count,
+                        service_appointment_stat.booked_hours,
+                        service_appointment_stat.revenue)
+                       IS DISTINCT FROM
+                       (EXCLUDED.currency_id, EXCLUDED.appointment_count,
+                        EXCLUDED.booked_hours, EXCLUDED.revenue)
+                RETURNING 1
+            ), deleted AS (
+                DELETE FROM service_appointment_stat stat
+                 WHERE NOT EXISTS (
+                        SELECT 1
+                          FROM fresh
+                         WHERE fresh.date = stat.date
+                           AND fresh.service_id = stat.service_id
+                           AND fresh.state = stat.state
+                       )
+                RETURNING 1
+            )
+            SELECT (SELECT COUNT(*) FROM upserted), (SELECT COUNT(*) FROM deleted)
+            """,
+            {"uid": self.env.uid},
+        )
+        upserted, deleted = self.env.cr.fetchone()
+        self.invalidate_model()
+        return upserted, deleted
+
+    def _cron_reconcile_stats(self):
+        """Cron job to realign the daily statistics with the appointments."""
+        upserted, deleted = self._reconcile()
+        _logger.info(
+            f"Cron: Reconciled daily booking statistics, {upserted} rows updated, "
+            f"{deleted} removed"
+        )
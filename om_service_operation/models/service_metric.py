@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields
+
+
+class ServiceMetric(models.Model):
+    """Running totals of the booking metrics, shared by all workers.
+
+    Rows are only written by ``MetricsService.flush``, which adds the
+    deltas observed by one worker to the stored values, so the table holds
+    the totals of every worker since the module was installed.
+    """
+
+    _name = "service.metric"
+    _description = "Booking Metric"
+    _order = "name, labels"
+    _log_access = False
+
+    name = fields.Char(string="Series", required=True, readonly=True)
+
+    labels = fields.Char(
+        string="Labels",
+        readonly=True,
+        help='Prometheus label set of the series, e.g. service="3"',
+    )
+
+    value = fields.Float(string="Value", readonly=True)
+
+    _sql_constraints = [
+        (
+            "name_labels_uniq",
+            "unique(name, labels)",
+            "A metric series is stored once per label set.",
+        ),
+    ]
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, _
+import base64
+import re
+
+
+class ServiceProfile(models.Model):
+    """Sample counts of the folded stacks of the profiled booking routes.
+
+    Rows are only written by ``ProfilerService.store``, which adds the
+    samples of one profiled request or cron run, so each row holds the
+    total samples of its stack since the profiler was enabled.
+    """
+
+    _name = "service.profile"
+    _description = "Booking Profile Stack"
+    _order = "route, samples desc"
+    _rec_name = "route"
+    _log_access = False
+
+    route = fields.Char(
+        string="Route",
+        required=True,
+        readonly=True,
+        help="URL rule of the controller or cron job, e.g. cron:send_reminders",
+    )
+
+    stack_hash = fields.Char(string="Stack Hash", required=True, readonly=True)
+
+    stack = fields.Text(
+        string="Stack",
+        required=True,
+        readonly=True,
+        help="Folded Python stack, root first: module:function;module:function",
+    )
+
+    samples = fields.Integer(string="Samples", readonly=True)
+
+    _sql_constraints = [
+        (
+            "route_stack_uniq",
+            "unique(route, stack_hash)",
+            "A stack is stored once per route.",
+        ),
+    ]
+
+    def action_download_folded(self):
+        """Download the selected stacks in the folded format of flame graph tools.
+
+        One ``stack count`` line per stack, the route as the root frame, as
+        read by flamegraph.pl or speedscope. The file is kept in a single
+        attachment of the first selected profile, rewritten on each download.
+        """
+        lines = [
+            f"{profile.route.replace(' ', '_')};{profile.stack} {profile.samples}"
+            for profile in self
+        ]
+        routes = set(self.mapped("route"))
+        name = routes.pop() if len(routes) == 1 else "booking"
+        name = re.sub(r"[^\w.-]+", "_", name).strip("_") or "profile"
+
+        owner = self.sorted("id")[:1]
+        values = {
+            "datas": base64.b64encode(("\n".join(lines) + "\n").encode()),
+            "mimetype": "text/plain",
+        }
+        # Profiles are read-only, which would deny writing their attachments
+        Attachment = self.env["ir.attachment"].sudo()
+        attachment = Attachment.search(
+            [
+                ("res_model", "=", self._name),
+                ("res_id", "=", owner.id),
+                ("name", "=", f"{name}.folded"),
+            ],
+            limit=1,
+        )
+        if attachment:
+            attachment.write(values)
+        else:
+            attachment = Attachment.create(
+                dict(
+                    values,
+                    name=f"{name}.folded",
+                    res_model=self._name,
+                    res_id=owner.id,
+                    description=_("Booking profile stacks"),
+                )
+            )
+        return {
+            "type": "ir.actions.act_url",
+            "url": f"/web/content/{attachment.id}?download=true",
+            "target": "self",
+        }
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from odoo import api, models, fields
+from datetime import timedelta
+
+
+class ServiceSlotLock(models.Model):
+    """One row per service and hour that bookings or holds were checked for.
+
+    Rows are only written by ``AppointmentService.lock_slots``, which
+    upserts the hours covered by the bookings it is about to check: two
+    transactions booking overlapping intervals of a service share at least
+    one row, so the second fails with a serialization error and is retried.
+    """
+
+    _name = "service.slot.lock"
+    _description = "Booking Slot Lock"
+    _order = "bucket desc, service_id"
+    _log_access = False
+
+    service_id = fields.Many2one(
+        "booking.service",
+        string="Service",
+        required=True,
+        readonly=True,
+        ondelete="cascade",
+    )
+
+    bucket = fields.Datetime(
+        string="Hour",
+        required=True,
+        readonly=True,
+        help="Start of the hour (UTC) the row serializes the bookings of",
+    )
+
+    _sql_constraints = [
+        (
+            "service_bucket_uniq",
+            "unique(service_id, bucket)",
+            "A slot lock is stored once per service and hour.",
+        ),
+    ]
+
+    @api.model
+    def _purge_past(self, days=1):
+        """Delete the rows of hours ended more than ``days`` ago."""
+        self.env.cr.execute(
+            "DELETE FROM service_slot_lock WHERE bucket < %s",
+            [fields.Datetime.now() - timedelta(days=days, hours=1)],
+        )
+        return self.env.cr.rowcount
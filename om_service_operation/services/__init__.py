@@ -1,3 +1,6 @@
 # -*- coding: utf-8 -*-
 from . import appointment_service
 from . import email_service
+from . import metrics_service
+from . import profiler_service
+from . import utilization_service
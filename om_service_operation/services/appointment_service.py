@@ -1,7 +1,81 @@
 # -*- coding: utf-8 -*-
-from datetime import datetime, timedelta
-from odoo import _
+from datetime import datetime, time, timedelta
+from odoo import _, fields
 from odoo.exceptions import ValidationError
+from psycopg2.extras import execute_values
+import heapq
+import pytz
+
+
+SLOT_CHANNEL_PREFIX = "om_booking_slots"
+SLOT_NOTIFICATION_TYPE = "om_booking/slot_update"
+
+# Local start hours of the bookable slots (8:00 to 16:00, hourly)
+BUSINESS_HOURS = range(8, 17)
+
+# Granularity of the rows serializing the capacity checks (see lock_slots)
+SLOT_LOCK_BUCKET = timedelta(hours=1)
+
+# Rows fetched per page by the ordered schedule scan
+SCHEDULE_SCAN_PAGE = 200
+
+# Kinds of schedule rows
+SCHEDULE_APPOINTMENT = 0
+SCHEDULE_HOLD = 1
+
+
+def sweep_timeline(intervals, start, end):
+    """Number of concurrent ``intervals`` over ``[start, end)``.
+
+    Sweeps the sorted interval bounds once and returns consecutive
+    ``(segment_start, segment_end, count)`` tuples covering the range.
+    Intervals are half-open, so back-to-back intervals never overlap.
+    """
+    events = []
+    for begin, finish in intervals:
+        begin, finish = max(begin, start), min(finish, end)
+        if begin < finish:
+            events.append((begin, 1))
+            events.append((finish, -1))
+
+    # Ends sort before starts at the same instant
+    events.sort()
+
+    timeline = []
+    count = 0
+    cursor = start
+    for moment, delta in events:
+        if moment > cursor:
+            if timeline and timeline[-1][2] == count:
+                timeline[-1] = (timeline[-1][0], moment, count)
+            else:
+                timeline.append((cursor, moment, count))
+            cursor = moment
+        count += delta
+
+    if cursor < end:
+        if timeline and timeline[-1][2] == count:
+            timeline[-1] = (timeline[-1][0], end, count)
+        else:
+            timeline.append((cursor, end, count))
+
+    return timeline
+
+
+def peak_concurrency(timeline, start=None, end=None):
+    """Highest count of a timeline, optionally within ``[start, end)``.
+
+    Accepts the tuples of ``sweep_timeline`` as well as the segment dicts of
+    ``AppointmentService.get_capacity_timeline``.
+    """
+    peak = 0
+    for segment in timeline:
+        if isinstance(segment, dict):
+            segment = (segment["start"], segment["end"], segment["bookings"])
+        if start is not None and (segment[0] >= end or segment[1] <= start):
+            continue
+        peak = max(peak, segment[2])
+    return peak
 
 
 class AppointmentService:
@@ -9,47 +83,571 @@ class AppointmentService:
         self.env = env
         self.Appointment = env["service.appointment"]
 
-    def check_availability(self, service, booking_date, end_date, exclude_id=None):
-        domain = [
-            ("service_id", "=", service.id),
-            ("state", "not in", ["cancel"]),
-            "|",
-            "&",
-            ("booking_date", "<", end_date),
-            ("end_date", ">", booking_date),
-            "&",
-            ("booking_date", "=", booking_date),
-            ("end_date", "=", end_date),
-        ]
+    def check_availability(
+        self, service, booking_date, end_date, exclude_id=None, exclude_hold=None
+    ):
+        """Whether ``service`` is at capacity somewhere in ``[booking_date, end_date)``.
+
+        Compares the peak number of concurrent bookings (appointments and
+        active holds) over the window with ``max_concurrent_bookings``, so
+        appointments that overlap the window but not each other (e.g. two
+        back-to-back bookings) only count once.
+
+        Returns ``(is_full, conflicting appointment or None, error message)``.
+        """
+        from .metrics_service import MetricsService
+
+        with MetricsService(self.env).timer("booking_overlap_check_seconds"):
+            max_capacity = service.max_concurrent_bookings
 
-        if exclude_id:
-            domain.append(("id", "!=", exclude_id))
+            if max_capacity == 0:
+                return (False, None, None)
 
-        overlapping = self.Appointment.search(domain)
-        overlap_count = len(overlapping)
+            rows = list(
+                self._iter_schedule(
+                    service, booking_date, end_date, exclude_hold, exclude_id
+                )
+            )
+            peak = peak_concurrency(
+                sweep_timeline([row[:2] for row in rows], booking_date, end_date)
+            )
 
-        max_capacity = service.max_concurrent_bookings
+            if peak >= max_capacity:
+                conflicting = self.Appointment.browse(
+                    [row[3] for row in rows if row[2] == SCHEDULE_APPOINTMENT][:1]
+                )
+
+                if peak == 1 and conflicting:
+                    error_msg = _(
+                        "Time slot unavailable!\n\n"
+                        "Conflicting appointment: %s\n"
+                        'Service "%s" allows only %d booking at this time.'
+                    ) % (conflicting.reference, service.name, max_capacity)
+                else:
+                    error_msg = _(
+                        "Time slot fully booked!\n\n"
+                        'Service "%s" capacity: %d/%d bookings\n'
+                        "This slot is full. Please select another time."
+                    ) % (service.name, peak, max_capacity)
+
+                return (True, conflicting or None, error_msg)
 
-        if max_capacity == 0:
             return (False, None, None)
 
-        if overlap_count >= max_capacity:
-            if overlap_count == 1:
-                error_msg = _(
-                    "Time slot unavailable!\n\n"
-                    "Conflicting appointment: %s\n"
-                    'Service "%s" allows only %d booking at this time.'
-                ) % (overlapping[0].reference, service.name, max_capacity)
+    def lock_slots(self, slots):
+        """Serialize the capacity checks of overlapping ``slots`` across transactions.
+
+        ``slots`` are ``(service, start, end)`` tuples; call before reading
+        their bookings. A ``service_slot_lock`` row is upserted per service
+        and hour the slots cover, in a stable order: a concurrent transaction
+        covering one of these hours waits for this one, then fails with a
+        serialization error since its snapshot misses the row written here,
+        and Odoo retries it with a fresh snapshot that sees the bookings
+        committed meanwhile. Bookings of other hours do not wait. A lock
+        alone would not do, as the waiting transaction would keep reading
+        its old snapshot. Services without a capacity limit are skipped.
+        """
+        rows = set()
+        for service, start, end in slots:
+            if not service.max_concurrent_bookings or not start or not end:
+                continue
+            bucket = start.replace(minute=0, second=0, microsecond=0)
+            while bucket < end:
+                rows.add((service.id, bucket))
+                bucket += SLOT_LOCK_BUCKET
+        if not rows:
+            return
+
+        execute_values(
+            self.env.cr._obj,
+            """
+            INSERT INTO service_slot_lock (service_id, bucket)
+            VALUES %s
+            ON CONFLICT (service_id, bucket) DO UPDATE SET bucket = EXCLUDED.bucket
+            """,
+            sorted(rows),
+        )
+
+    def get_capacity_timeline(
+        self, service, start, end, exclude_id=None, exclude_hold=None
+    ):
+        """Concurrent bookings and free capacity of ``service`` over ``[start, end)``.
+
+        Returns consecutive ``{"start", "end", "bookings", "free"}`` segments
+        covering the range, ``free`` being None for unlimited services. Use
+        ``peak_concurrency`` to get the busiest moment of any sub-range.
+        """
+        capacity = service.max_concurrent_bookings
+        rows = self._iter_schedule(service, start, end, exclude_hold, exclude_id)
+
+        return [
+            {
+                "start": segment_start,
+                "end": segment_end,
+                "bookings": bookings,
+                "free": max(capacity - bookings, 0) if capacity else None,
+            }
+            for segment_start, segment_end, bookings in sweep_timeline(
+                [row[:2] for row in rows], start, end
+            )
+        ]
+
+    def find_capacity_conflicts(self, appointments):
+        """Segments where ``appointments`` push a service over its capacity.
+
+        The non-cancelled appointments of each service are read with one
+        interval query spanning all of its given appointments, once these
+        are flushed, so conflicts among the given appointments themselves
+        are found as well as with the existing ones. Only segments
+        overlapping one of the given appointments are reported.
+
+        The covered hours are locked first (``lock_slots``), so concurrent
+        transactions booking overlapping intervals are counted one after
+        the other instead of each seeing capacity left.
+
+        Returns a list of ``(service, start, end, bookings)`` tuples.
+        """
+        by_service = {}
+        for appointment in appointments:
+            if appointment.service_id.max_concurrent_bookings:
+                by_service.setdefault(appointment.service_id, []).append(
+                    (appointment.booking_date, appointment.end_date)
+                )
+        if not by_service:
+            return []
+
+        self.lock_slots(
+            (service, begin, finish)
+            for service, written in by_service.items()
+            for begin, finish in written
+        )
+        self.Appointment.flush_model(["service_id", "booking_date", "end_date", "state"])
+
+        conflicts = []
+        for service, written in by_service.items():
+            start = min(begin for begin, _finish in written)
+            end = max(finish for _begin, finish in written)
+
+            self.env.cr.execute(
+                """
+                SELECT booking_date, end_date
+                  FROM service_appointment
+                 WHERE service_id = %s
+                   AND state != 'cancel'
+                   AND booking_date < %s
+                   AND end_date > %s
+                """,
+                [service.id, end, start],
+            )
+            capacity = service.max_concurrent_bookings
+
+            for segment_start, segment_end, bookings in sweep_timeline(
+                self.env.cr.fetchall(), start, end
+            ):
+                if bookings > capacity and any(
+                    begin < segment_end and finish > segment_start
+                    for begin, finish in written
+                ):
+                    conflicts.append((service, segment_start, segment_end, bookings))
+
+        return conflicts
+
+    def get_schedule_window(self, services, start, end):
+        """Appointments and capacity of ``services`` over ``[start, end)``.
+
+        One interval query for the appointments of all the services and one
+        for their active holds, both bounded by the window (range scans of
+        the ``(service_id, end_date, booking_date)`` index), then a
+        sweep-line per service. Appointments are given the first free
+        ``lane`` so overlapping ones can be drawn one under the other.
+
+        The capacity counts every booking, as ``check_availability`` does;
+        record rules only filter the appointments returned for display.
+
+        Returns ``{service_id: {"appointments", "capacity", "lanes", "peak"}}``
+        where ``capacity`` lists the ``{"start", "end", "bookings", "free"}``
+        segments holding at least one booking.
+        """
+        bookings = self.Appointment.sudo().search_fetch(
+            [
+                ("service_id", "in", services.ids),
+                ("state", "!=", "cancel"),
+                ("booking_date", "<", end),
+                ("end_date", ">", start),
+            ],
+            ["service_id", "booking_date", "end_date"],
+            order="service_id, booking_date, id",
+        )
+
+        holds = self.env["service.appointment.hold"].sudo().search_fetch(
+            [
+                ("service_id", "in", services.ids),
+                ("expires_at", ">", fields.Datetime.now()),
+                ("booking_date", "<", end),
+                ("end_date", ">", start),
+            ],
+            ["service_id", "booking_date", "end_date"],
+        )
+
+        intervals = {service.id: [] for service in services}
+        for booking in [*bookings, *holds]:
+            intervals[booking.service_id.id].append(
+                (booking.booking_date, booking.end_date)
+            )
+
+        # In the caller's environment, keeping the schedule order
+        appointments = self.Appointment.browse(bookings.ids)._filtered_access("read")
+        appointments.fetch(["reference", "customer_id", "state"])
+        appointments.customer_id.fetch(["name"])
+
+        window = {
+            service.id: {"appointments": [], "capacity": [], "lanes": 0, "peak": 0}
+            for service in services
+        }
+        # End dates of the last appointment drawn in each lane, per service
+        lane_ends = {service.id: [] for service in services}
+
+        for appointment in appointments:
+            service_id = appointment.service_id.id
+            ends = lane_ends[service_id]
+            lane = next(
+                (
+                    index
+                    for index, lane_end in enumerate(ends)
+                    if lane_end <= appointment.booking_date
+                ),
+                len(ends),
+            )
+            if lane == len(ends):
+                ends.append(appointment.end_date)
             else:
-                error_msg = _(
-                    "Time slot fully booked!\n\n"
-                    'Service "%s" capacity: %d/%d bookings\n'
-                    "This slot is full. Please select another time."
-                ) % (service.name, overlap_count, max_capacity)
+                ends[lane] = appointment.end_date
+
+            window[service_id]["appointments"].append(
+                {
+                    "id": appointment.id,
+                    "reference": appointment.reference,
+                    "customer": appointment.customer_id.name,
+                    "start": fields.Datetime.to_string(appointment.booking_date),
+                    "end": fields.Datetime.to_string(appointment.end_date),
+                    "state": appointment.state,
+                    "lane": lane,
+                }
+            )
+
+        for service in services:
+            capacity = service.max_concurrent_bookings
+            timeline = sweep_timeline(intervals[service.id], start, end)
+            window[service.id].update(
+                lanes=len(lane_ends[service.id]),
+                peak=peak_concurrency(timeline),
+                capacity=[
+                    {
+                        "start": fields.Datetime.to_string(segment_start),
+                        "end": fields.Datetime.to_string(segment_end),
+                        "bookings": bookings,
+                        "free": max(capacity - bookings, 0) if capacity else None,
+                    }
+                    for segment_start, segment_end, bookings in timeline
+                    if bookings
+                ],
+            )
+
+        return window
+
+    def check_availability_batch(self, service, windows):
+        """Check many ``(start, end)`` windows of ``service`` in one ordered scan.
+
+        Windows are walked in start order against the appointments and holds
+        read once from the schedule. Windows found available are counted
+        against the following ones, as if booked together (e.g. the
+        occurrences of a recurring series).
+
+        Returns one ``{"start", "end", "bookings", "available"}`` dict per
+        window, in the given order.
+        """
+        capacity = service.max_concurrent_bookings
+        if not windows:
+            return []
+        if capacity == 0:
+            return [
+                {"start": start, "end": end, "bookings": 0, "available": True}
+                for start, end in windows
+            ]
+
+        order = sorted(range(len(windows)), key=lambda index: windows[index])
+        intervals = self._iter_schedule(
+            service, windows[order[0]][0], max(end for _start, end in windows)
+        )
+
+        # (end, start) of the intervals overlapping the current window
+        active = []
+        pending = next(intervals, None)
+        results = [None] * len(windows)
+
+        for index in order:
+            start, end = windows[index]
+
+            while pending and pending[0] < end:
+                heapq.heappush(active, (pending[1], pending[0]))
+                pending = next(intervals, None)
+
+            while active and active[0][0] <= start:
+                heapq.heappop(active)
+
+            bookings = peak_concurrency(
+                sweep_timeline([(begin, finish) for finish, begin in active], start, end)
+            )
+            available = bookings < capacity
+            if available:
+                heapq.heappush(active, (end, start))
+
+            results[index] = {
+                "start": start,
+                "end": end,
+                "bookings": bookings,
+                "available": available,
+            }
+
+        intervals.close()
+        return results
+
+    def find_free_slots(
+        self, service, start, end, limit=5, tz_name="UTC", exclude_hold=None
+    ):
+        """First ``limit`` bookable slots of ``service`` starting in ``[start, end)``.
+
+        Slot starts follow ``BUSINESS_HOURS`` in ``tz_name``. The occupying
+        appointments and holds are read once, in booking date order, while
+        walking the slots: a heap keeps the end dates of the intervals
+        overlapping the current slot, so each row is looked at once and the
+        scan stops as soon as enough free slots are found. A slot is free
+        while the peak concurrency of those intervals stays under capacity.
+
+        Returns a list of ``{"start", "end", "bookings"}`` dicts with naive
+        UTC bounds.
+        """
+        duration = timedelta(hours=service.duration)
+        capacity = service.max_concurrent_bookings
+        intervals = self._iter_schedule(service, start, end + duration, exclude_hold)
+
+        # (end, start) of the intervals overlapping the current slot
+        active = []
+        pending = next(intervals, None)
+        free_slots = []
+
+        for slot_start in self._iter_slot_starts(tz_name, start, end):
+            slot_end = slot_start + duration
+
+            # Take in every interval starting before the slot ends...
+            while pending and pending[0] < slot_end:
+                heapq.heappush(active, (pending[1], pending[0]))
+                pending = next(intervals, None)
+
+            # ...and forget those that ended before it starts
+            while active and active[0][0] <= slot_start:
+                heapq.heappop(active)
+
+            bookings = peak_concurrency(
+                sweep_timeline(
+                    [(begin, finish) for finish, begin in active], slot_start, slot_end
+                )
+            )
+            if capacity == 0 or bookings < capacity:
+                free_slots.append(
+                    {"start": slot_start, "end": slot_end, "bookings": bookings}
+                )
+                if len(free_slots) >= limit:
+                    break
+
+        intervals.close()
+        return free_slots
+
+    def _iter_slot_starts(self, tz_name, start, end):
+        """Yield the naive UTC slot starts within ``[start, end)`` in order."""
+        timezone = pytz.timezone(tz_name)
+        day = pytz.UTC.localize(start).astimezone(timezone).date()
+        last_day = pytz.UTC.localize(end).astimezone(timezone).date()
+
+        while day <= last_day:
+            for hour in BUSINESS_HOURS:
+                local = timezone.localize(datetime.combine(day, time(hour)))
+                slot_start = local.astimezone(pytz.UTC).replace(tzinfo=None)
+                if slot_start >= end:
+                    return
+                if slot_start >= start:
+                    yield slot_start
+            day += timedelta(days=1)
+
+    def _iter_schedule(self, service, start, end, exclude_hold=None, exclude_id=None):
+        """Yield ``(booking_date, end_date, kind, id)`` of what occupies ``service``.
+
+        Covers non-cancelled appointments and active holds overlapping
+        ``[start, end)``, in booking date order, fetched page by page so an
+        early stop never reads the rest of the horizon. ``kind`` is
+        ``SCHEDULE_APPOINTMENT`` or ``SCHEDULE_HOLD``.
+        """
+        self.Appointment.flush_model(["service_id", "booking_date", "end_date", "state"])
+        self.env["service.appointment.hold"].flush_model()
+
+        query = """
+            SELECT booking_date, end_date, kind, id FROM (
+                SELECT booking_date, end_date, 0 AS kind, id
+                  FROM service_appointment
+                 WHERE service_id = %(service_id)s
+                   AND state != 'cancel'
+                   AND id != %(exclude_id)s
+                   AND booking_date < %(end)s
+                   AND end_date > %(start)s
+             UNION ALL
+                SELECT booking_date, end_date, 1 AS kind, id
+                  FROM service_appointment_hold
+                 WHERE service_id = %(service_id)s
+                   AND expires_at > %(now)s
+                   AND token != %(exclude_hold)s
+                   AND booking_date < %(end)s
+                   AND end_date > %(start)s
+            ) schedule
+            WHERE (booking_date, kind, id) > (%(after_date)s, %(after_kind)s, %(after_id)s)
+         ORDER BY booking_date, kind, id
+            LIMIT %(limit)s
+        """
+        params = {
+            "service_id": service.id,
+            "start": start,
+            "end": end,
+            "now": fields.Datetime.now(),
+            "exclude_hold": exclude_hold or "",
+            "exclude_id": exclude_id or 0,
+            "after_date": datetime.min,
+            "after_kind": 0,
+            "after_id": 0,
+            "limit": SCHEDULE_SCAN_PAGE,
+        }
+
+        while True:
+            self.env.cr.execute(query, params)
+            rows = self.env.cr.fetchall()
+
+            yield from rows
+
+            if len(rows) < SCHEDULE_SCAN_PAGE:
+                return
+
+            params.update(
+                after_date=rows[-1][0], after_kind=rows[-1][2], after_id=rows[-1][3]
+            )
+
+    def get_slot_channels(self, service_id, start, end):
+        """Return the bus channels (one per UTC day) touched by ``[start, end]``."""
+        channels = []
+        day = start.date()
+        while day <= end.date():
+            channels.append(f"{SLOT_CHANNEL_PREFIX}_{service_id}_{day.isoformat()}")
+            day += timedelta(days=1)
+        return channels
+
+    def get_slot_payload(self, appointment, delta):
+        """Occupancy delta for one appointment, or None if it holds no slot."""
+        if (
+            appointment.state == "cancel"
+            or not appointment.booking_date
+            or not appointment.end_date
+        ):
+            return None
+
+        return {
+            "service_id": appointment.service_id.id,
+            "start": fields.Datetime.to_string(appointment.booking_date),
+            "end": fields.Datetime.to_string(appointment.end_date),
+            "delta": delta,
+        }
+
+    def notify_slot_changes(self, payloads):
+        """Push occupancy changes to the booking pages listening on the bus.
+
+        Each payload carries the capacity ``timeline`` of its service over
+        the change widened by the service duration on both sides, which
+        covers every slot overlapping the change: the pages recompute the
+        peak of these slots from it instead of fetching the day again.
+        """
+        Bus = self.env["bus.bus"].sudo()
+        Service = self.env["booking.service"].sudo()
+
+        for payload in payloads:
+            start = fields.Datetime.to_datetime(payload["start"])
+            end = fields.Datetime.to_datetime(payload["end"])
+            service = Service.browse(payload["service_id"])
+            margin = timedelta(hours=service.duration or 0)
+
+            payload = dict(
+                payload,
+                timeline=[
+                    {
+                        "start": fields.Datetime.to_string(segment["start"]),
+                        "end": fields.Datetime.to_string(segment["end"]),
+                        "bookings": segment["bookings"],
+                    }
+                    for segment in self.get_capacity_timeline(
+                        service, start - margin, end + margin
+                    )
+                ],
+            )
+            for channel in self.get_slot_channels(service.id, start, end):
+                Bus._sendone(channel, SLOT_NOTIFICATION_TYPE, payload)
+
+    def claim_due_reminders(self, limit):
+        """Lock up to ``limit`` confirmed appointments whose next reminder is due.
+
+        A range scan of the ``reminder_due_at`` index (which only holds
+        appointments with a pending reminder), restricted to appointments
+        not started yet and customers with an email. Rows locked by another
+        transaction are skipped.
+        """
+        now = datetime.now()
+        return self._claim(
+            """
+            a.state = 'confirmed'
+            AND a.reminder_due_at <= %(now)s
+            AND a.booking_date > %(now)s
+            """,
+            {"now": now},
+            limit,
+            order="a.reminder_due_at, a.id",
+        )
+
+    def claim_recently_completed(self, limit, hours_ago=24):
+        """Lock up to ``limit`` completed appointments due for a thank-you email."""
+        now = datetime.now()
+        return self._claim(
+            """
+            a.state = 'done'
+            AND a.completion_email_sent IS NOT TRUE
+            AND a.end_date >= %(from)s
+            AND a.end_date <= %(to)s
+            """,
+            {"from": now - timedelta(hours=hours_ago), "to": now},
+            limit,
+        )
 
-            return (True, overlapping[0] if overlapping else None, error_msg)
+    def _claim(self, condition, params, limit, order="a.booking_date, a.id"):
+        """``SELECT ... FOR UPDATE SKIP LOCKED`` of appointments to mail."""
+        self.Appointment.flush_model()
 
-        return (False, None, None)
+        self.env.cr.execute(
+            f"""
+            SELECT a.id
+              FROM service_appointment a
+              JOIN res_partner p ON p.id = a.customer_id
+             WHERE {condition}
+               AND COALESCE(p.email, '') != ''
+          ORDER BY {order}
+             LIMIT %(limit)s
+               FOR UPDATE OF a SKIP LOCKED
+            """,
+            dict(params, limit=limit),
+        )
+        return self.Appointment.browse([row[0] for row in self.env.cr.fetchall()])
 
     def get_upcoming_appointments(self, hours_ahead=24):
         now = datetime.now()
@@ -1,17 +1,20 @@
 # -*- coding: utf-8 -*-
-from odoo import _
-from odoo.exceptions import UserError
 import logging
 
 _logger = logging.getLogger(__name__)
 
+# Appointments rendered and sent together by the batch paths
+MAIL_BATCH_SIZE = 500
+
 
 class EmailService:
     def __init__(self, env):
         self.env = env
         from .appointment_service import AppointmentService
+        from .metrics_service import MetricsService
 
         self.appointment_service = AppointmentService(env)
+        self.metrics = MetricsService(env)
 
     def send_confirmation_email(self, appointment):
         try:
@@ -34,6 +37,10 @@ class EmailService:
 
             template = template.sudo()
             template.send_mail(appointment.id, force_send=True)
+            self.metrics.inc(
+                "booking_emails_sent_total",
+                template="om_service_operation.email_booking_confirmation",
+            )
 
             _logger.info(
                 f"Confirmation email sent for appointment {appointment.reference} "
@@ -44,14 +51,19 @@ class EmailService:
 
         except Exception as e:
             _logger.error(f"Error sending confirmation email: {str(e)}")
+            self.metrics.inc(
+                "booking_email_failures_total",
+                template="om_service_operation.email_booking_confirmation",
+            )
             return False
 
-    def send_reminder_emails(self):
-        try:
-            appointments = self.appointment_service.get_upcoming_appointments(
-                hours_ahead=24
-            )
+    def send_reminder_emails(self, commit=False):
+        """Send the reminders that are due (see ``reminder_due_at``).
 
+        Work is claimed in chunks (see ``_send_claimed``), so several cron
+        workers can run this concurrently without sending twice.
+        """
+        try:
             template = self.env.sudo().ref(
                 "om_service_operation.email_appointment_reminder",
                 raise_if_not_found=False,
@@ -61,37 +73,14 @@ class EmailService:
                 _logger.error("Appointment reminder email template not found")
                 return 0
 
-            sent_count = 0
-
-            for appointment in appointments:
-                if appointment.reminder_sent:
-                    continue
-
-                if not appointment.customer_id.email:
-                    _logger.warning(
-                        f"Cannot send reminder for {appointment.reference}: "
-                        f"No email for customer {appointment.customer_id.name}"
-                    )
-                    continue
-
-                try:
-                    template.send_mail(appointment.id, force_send=True)
-                    appointment.write({"reminder_sent": True})
-
-                    sent_count += 1
-
-                    _logger.info(
-                        f"Reminder email sent for appointment {appointment.reference} "
-                        f"to {appointment.customer_id.email}"
-                    )
-
-                except Exception as e:
-                    _logger.error(
-                        f"Error sending reminder for {appointment.reference}: {str(e)}"
-                    )
-                    continue
+            sent_count = self._send_claimed(
+                template,
+                self.appointment_service.claim_due_reminders,
+                lambda batch: batch._mark_reminder_sent(),
+                commit=commit,
+            )
 
-            _logger.info(f"Reminder emails sent: {sent_count}/{len(appointments)}")
+            _logger.info(f"Reminder emails sent: {sent_count}")
             return sent_count
 
         except Exception as e:
@@ -137,10 +126,12 @@ class EmailService:
             _logger.error(f"Error sending completion email: {str(e)}")
             return False
 
-    def send_completion_notifications_batch(self):
-        try:
-            appointments = self.appointment_service.get_recently_completed(hours_ago=24)
+    def send_completion_notifications_batch(self, commit=False):
+        """Send thank-you emails for appointments completed in the last 24 hours.
 
+        Claims work in chunks like ``send_reminder_emails``.
+        """
+        try:
             template = self.env.sudo().ref(
                 "om_service_operation.email_completion_notification",
                 raise_if_not_found=False,
@@ -150,38 +141,144 @@ class EmailService:
                 _logger.error("Completion notification email template not found")
                 return 0
 
-            sent_count = 0
+            sent_count = self._send_claimed(
+                template,
+                lambda limit: self.appointment_service.claim_recently_completed(
+                    limit, hours_ago=24
+                ),
+                lambda batch: batch.write({"completion_email_sent": True}),
+                commit=commit,
+            )
 
-            for appointment in appointments:
-                if appointment.completion_email_sent:
-                    continue
+            _logger.info(f"Completion emails sent: {sent_count}")
+            return sent_count
 
-                if not appointment.customer_id.email:
-                    _logger.warning(
-                        f"Cannot send completion email for {appointment.reference}: "
-                        f"No email for customer {appointment.customer_id.name}"
-                    )
-                    continue
+        except Exception as e:
+            _logger.error(f"Error in send_completion_notifications_batch: {str(e)}")
+            return 0
 
-                try:
-                    template.send_mail(appointment.id, force_send=True)
-                    appointment.write({"completion_email_sent": True})
-                    sent_count += 1
+    def _send_claimed(self, template, claim, mark, commit=False):
+        """Claim chunks of due appointments and mail them until none is left.
+
+        ``claim(limit)`` locks up to ``limit`` due appointments with
+        ``FOR UPDATE SKIP LOCKED``: rows claimed by another worker are
+        skipped instead of waited for, so concurrent workers split the work.
+        With ``commit`` (cron jobs), each chunk is committed once marked,
+        before talking to SMTP, which releases its locks and makes the sent
+        flags visible to the other workers.
+        """
+        sent_count = 0
+
+        while True:
+            batch = claim(MAIL_BATCH_SIZE)
+            if not batch:
+                break
+
+            sent, marked = self._send_template_batch(
+                template, batch, mark, commit=commit
+            )
+            sent_count += sent
+            if not marked:
+                # Nothing could be marked: the chunk would be claimed again
+                break
+
+        return sent_count
+
+    def _send_template_batch(self, template, appointments, mark, commit=False):
+        """Mail ``template`` to ``appointments`` in mass mode.
+
+        Each batch is rendered in one call, its ``mail.mail`` records are
+        created together and sent over one SMTP connection per mail server.
+        ``mark(batch)`` flags the batch as processed once its mails are queued,
+        so a failed send is retried by the mail queue rather than by the next
+        cron run. A batch failing to render is rolled back and sent one
+        appointment at a time (see ``_send_one_by_one``).
+
+        Returns ``(queued emails, appointments marked)``.
+        """
+        sent_count = 0
+        marked_count = 0
+        template_label = template.get_external_id().get(template.id) or template.name
+
+        for start in range(0, len(appointments), MAIL_BATCH_SIZE):
+            batch = appointments[start : start + MAIL_BATCH_SIZE]
+
+            try:
+                with self.env.cr.savepoint():
+                    mails = template.send_mail_batch(batch.ids, force_send=False)
+                    mark(batch)
+                marked_count += len(batch)
+            except Exception as e:
+                _logger.warning(
+                    f"Error rendering {template.name} for {len(batch)} appointments, "
+                    f"sending them one by one: {str(e)}"
+                )
+                mails, marked = self._send_one_by_one(
+                    template, batch, mark, template_label
+                )
+                marked_count += marked
+
+            sent_count += len(mails)
+            if not mails:
+                if commit:
+                    self.env.cr.commit()
+                continue
+
+            if commit:
+                self.env.cr.commit()
+
+            mails.send(raise_exception=False)
+            if commit:
+                self.env.cr.commit()
+
+            # Sent mails may have been deleted (auto_delete)
+            failed = mails.exists().filtered(lambda mail: mail.state == "exception")
+            self.metrics.inc(
+                "booking_emails_sent_total",
+                len(mails) - len(failed),
+                template=template_label,
+            )
+            if failed:
+                self.metrics.inc(
+                    "booking_email_failures_total", len(failed), template=template_label
+                )
 
-                    _logger.info(
-                        f"Completion email sent for appointment {appointment.reference} "
-                        f"to {appointment.customer_id.email}"
-                    )
+            _logger.info(
+                f"{template.name}: {len(mails)} emails sent for appointments "
+                f"{batch[0].reference} to {batch[-1].reference}"
+            )
 
-                except Exception as e:
-                    _logger.error(
-                        f"Error sending completion email for {appointment.reference}: {str(e)}"
-                    )
-                    continue
+        return sent_count, marked_count
+
+    def _send_one_by_one(self, template, appointments, mark, template_label):
+        """Fallback of a batch that failed to render: one savepoint per appointment.
+
+        Appointments that still fail are counted as failures and marked all
+        the same, so they are skipped by the next runs instead of blocking
+        the queue. Returns ``(queued mails, appointments marked)``.
+        """
+        mails = self.env["mail.mail"]
+        marked_count = 0
+
+        for appointment in appointments:
+            try:
+                with self.env.cr.savepoint():
+                    mails |= template.send_mail_batch(appointment.ids, force_send=False)
+                    mark(appointment)
+                marked_count += 1
+                continue
+            except Exception as e:
+                _logger.error(
+                    f"Error rendering {template.name} for {appointment.reference}, "
+                    f"skipped: {str(e)}"
+                )
+                self.metrics.inc("booking_email_failures_total", template=template_label)
 
-            _logger.info(f"Completion emails sent: {sent_count}/{len(appointments)}")
-            return sent_count
+            try:
+                with self.env.cr.savepoint():
+                    mark(appointment)
+                marked_count += 1
+            except Exception as e:
+                _logger.error(f"Could not skip {appointment.reference}: {str(e)}")
 
-        except Exception as e:
-            _logger.error(f"Error in send_completion_notifications_batch: {str(e)}")
-            return 0
+        return mails, marked_count
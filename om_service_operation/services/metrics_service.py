@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""Prometheus-style counters and histograms of booking operations.
+
+Each worker process accumulates its observations in memory and adds them
+to the ``service_metric`` table at most every ``FLUSH_INTERVAL`` seconds,
+on a cursor of its own: the stored values are the totals of all workers,
+and observations made during a request that is rolled back are kept.
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from psycopg2.extras import execute_values
+import logging
+import re
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Exported metric families: name -> (type, help)
+METRICS = {
+    "booking_created_total": (
+        "counter",
+        "Website bookings created, per service",
+    ),
+    "booking_rejected_total": (
+        "counter",
+        "Website bookings rejected, per service and reason",
+    ),
+    "booking_availability_request_seconds": (
+        "histogram",
+        "Latency of the /booking/check_availability endpoint",
+    ),
+    "booking_overlap_check_seconds": (
+        "histogram",
+        "Duration of the capacity check of a booking window",
+    ),
+    "booking_emails_sent_total": (
+        "counter",
+        "Appointment emails sent, per template",
+    ),
+    "booking_email_failures_total": (
+        "counter",
+        "Appointment emails that could not be rendered or sent, per template",
+    ),
+    "booking_email_queue_depth": (
+        "gauge",
+        "Appointments waiting for an email, and appointment emails waiting in the mail queue",
+    ),
+}
+
+# Upper bounds (seconds) of the histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# ``le`` label of a histogram bucket
+BUCKET_BOUND = re.compile(r'(^|,)le="([^"]*)",?')
+
+# Minimum delay (seconds) between two flushes of a worker
+FLUSH_INTERVAL = 10
+
+# Observations not flushed yet: {dbname: {(series, labels): value}}
+_pending = {}
+_last_flush = {}
+_lock = threading.Lock()
+
+
+def format_labels(**labels):
+    """Render a label set the Prometheus way: ``a="1",b="x"``."""
+    return ",".join(
+        '%s="%s"'
+        % (
+            key,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for key, value in sorted(labels.items())
+    )
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _sample_key(name, labels):
+    """Sort histogram buckets by their numeric upper bound."""
+    match = BUCKET_BOUND.search(labels)
+    if not name.endswith("_bucket") or not match:
+        return (name, labels, 0.0)
+    bound = match.group(2)
+    return (
+        name,
+        BUCKET_BOUND.sub(r"\1", labels),
+        float("inf") if bound == "+Inf" else float(bound),
+    )
+
+
+class MetricsService:
+    def __init__(self, env):
+        self.env = env
+
+    def inc(self, name, value=1, **labels):
+        """Increment the counter ``name`` by ``value``."""
+        self._add([((name, format_labels(**labels)), value)])
+
+    def observe(self, name, seconds, **labels):
+        """Record one observation of the histogram ``name``."""
+        samples = [
+            ((f"{name}_bucket", format_labels(le=bound, **labels)), 1)
+            for bound in LATENCY_BUCKETS
+            if seconds <= bound
+        ]
+        samples += [
+            ((f"{name}_bucket", format_labels(le="+Inf", **labels)), 1),
+            ((f"{name}_sum", format_labels(**labels)), seconds),
+            ((f"{name}_count", format_labels(**labels)), 1),
+        ]
+        self._add(samples)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the duration of the ``with`` block in the histogram ``name``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def _add(self, samples):
+        dbname = self.env.cr.dbname
+        with _lock:
+            pending = _pending.setdefault(dbname, {})
+            for key, value in samples:
+                pending[key] = pending.get(key, 0) + value
+        self.flush()
+
+    def flush(self, force=False):
+        """Add this worker's pending observations to the stored totals.
+
+        Runs in its own transaction, in a stable row order so concurrent
+        flushes of several workers cannot deadlock.
+        """
+        dbname = self.env.cr.dbname
+        now = time.monotonic()
+        with _lock:
+            if not force and now - _last_flush.get(dbname, 0) < FLUSH_INTERVAL:
+                return
+            _last_flush[dbname] = now
+            pending = _pending.pop(dbname, None)
+
+        if not pending:
+            return
+
+        rows = sorted((name, labels, value) for (name, labels), value in pending.items())
+        try:
+            with self.env.registry.cursor() as cr:
+                execute_values(
+                    cr._obj,
+                    """
+                    INSERT INTO service_metric (name, labels, value)
+                    VALUES %s
+                    ON CONFLICT (name, labels) DO UPDATE
+                        SET value = service_metric.value + EXCLUDED.value
+                    """,
+                    rows,
+                )
+        except Exception as e:
+            _logger.warning(f"Could not flush booking metrics: {str(e)}")
+            # Keep the observations for the next flush
+            with _lock:
+                pending_now = _pending.setdefault(dbname, {})
+                for key, value in pending.items():
+                    pending_now[key] = pending_now.get(key, 0) + value
+
+    def export(self):
+        """All metrics in the Prometheus text exposition format."""
+        self.flush(force=True)
+
+        self.env.cr.execute("SELECT name, labels, value FROM service_metric")
+        samples = {}
+        for name, labels, value in self.env.cr.fetchall():
+            samples.setdefault(name, []).append((labels or "", value))
+        for labels, value in self._get_queue_depths():
+            samples.setdefault("booking_email_queue_depth", []).append((labels, value))
+
+        lines = []
+        for family, (metric_type, help_text) in METRICS.items():
+            if metric_type == "histogram":
+                series = [f"{family}_bucket", f"{family}_sum", f"{family}_count"]
+            else:
+                series = [family]
+
+            family_samples = sorted(
+                (_sample_key(name, labels), name, labels, value)
+                for name in series
+                for labels, value in samples.get(name, [])
+            )
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} {metric_type}")
+            for _key, name, labels, value in family_samples:
+                if labels:
+                    lines.append(f"{name}{{{labels}}} {_format_value(value)}")
+                else:
+                    lines.append(f"{name} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def _get_queue_depths(self):
+        """Current ``(labels, value)`` samples of ``booking_email_queue_depth``.
+
+        Uses the same conditions as the claims of the email crons.
+        """
+        Appointment = self.env["service.appointment"].sudo()
+        now = datetime.now()
+
+        reminders = Appointment.search_count(
+            [
+                ("state", "=", "confirmed"),
+                ("reminder_due_at", "<=", now),
+                ("booking_date", ">", now),
+            ]
+        )
+        completions = Appointment.search_count(
+            [
+                ("state", "=", "done"),
+                ("completion_email_sent", "=", False),
+                ("end_date", ">=", now - timedelta(hours=24)),
+                ("end_date", "<=", now),
+            ]
+        )
+        outgoing = (
+            self.env["mail.mail"]
+            .sudo()
+            .search_count(
+                [("model", "=", "service.appointment"), ("state", "=", "outgoing")]
+            )
+        )
+
+        return [
+            (format_labels(queue="reminder"), reminders),
+            (format_labels(queue="completion"), completions),
+            (format_labels(queue="outgoing"), outgoing),
+        ]
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""Sampling profiler of the booking hot paths.
+
+A configurable fraction of the website booking requests and email cron
+runs is profiled: while it runs, a helper thread records the Python stack
+of the profiled thread every ``SAMPLE_INTERVAL`` seconds. The stacks are
+folded (``module:function;module:function``, root first) and their sample
+counts added to the ``service_profile`` table per route or job, on a
+cursor of its own, ready for flame graph tools.
+
+Runs that are not sampled only cost a random draw and a cached
+configuration lookup.
+"""
+from psycopg2.extras import execute_values
+import hashlib
+import logging
+import random
+import sys
+import threading
+
+_logger = logging.getLogger(__name__)
+
+# Seconds between two stack samples of a profiled run
+SAMPLE_INTERVAL = 0.005
+
+# Innermost frames kept per stack
+MAX_STACK_DEPTH = 128
+
+
+def fold_stack(frame, skip=0):
+    """``module:function`` of the frames of ``frame``, root first, joined by ``;``.
+
+    The ``skip`` outermost frames (the ones calling the profiled code) are
+    left out.
+    """
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(
+            "%s:%s"
+            % (
+                frame.f_globals.get("__name__", "?"),
+                getattr(code, "co_qualname", code.co_name),
+            )
+        )
+        frame = frame.f_back
+    names.reverse()
+    return ";".join(names[skip:][-MAX_STACK_DEPTH:])
+
+
+def stack_depth(frame):
+    """Number of frames from ``frame`` up to the thread's entry point."""
+    depth = 0
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
+
+
+class _Sampler(threading.Thread):
+    """Counts the folded stacks of one thread until stopped."""
+
+    def __init__(self, thread_id, skip):
+        super().__init__(name="booking-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.skip = skip
+        self.stacks = {}
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None or self.stopped.is_set():
+                continue
+            stack = fold_stack(frame, self.skip)
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+
+class _Profile:
+    """``with`` block sampling the current thread, see ``ProfilerService.profile``."""
+
+    def __init__(self, service, route):
+        self.service = service
+        self.route = route
+        self.sampler = None
+
+    def __enter__(self):
+        # Keep the frame of the ``with`` statement as the root of the stacks
+        skip = stack_depth(sys._getframe(1)) - 1
+        self.sampler = _Sampler(threading.get_ident(), skip)
+        self.sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.sampler.stopped.set()
+        self.sampler.join()
+        self.service.store(self.route, self.sampler.stacks)
+        return False
+
+
+class _NotSampled:
+    """``with`` block of a run that is not profiled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NOT_SAMPLED = _NotSampled()
+
+
+class ProfilerService:
+    def __init__(self, env):
+        self.env = env
+
+    def get_sample_rate(self):
+        """Fraction of the runs to profile (0 disables the profiler)."""
+        try:
+            rate = float(
+                self.env["ir.config_parameter"]
+                .sudo()
+                .get_param("om_service_operation.profiler_sample_rate", 0)
+                or 0
+            )
+        except ValueError:
+            return 0.0
+        return min(max(rate, 0.0), 1.0)
+
+    def profile(self, route):
+        """Context manager profiling the block when this run is sampled.
+
+        ``route`` names the aggregate the stacks are added to, e.g. the URL
+        rule of a controller or ``cron:send_reminders``.
+        """
+        rate = self.get_sample_rate()
+        if not rate or random.random() >= rate:
+            return NOT_SAMPLED
+        return _Profile(self, route)
+
+    def store(self, route, stacks):
+        """Add the sample counts of ``stacks`` to the aggregates of ``route``.
+
+        Runs in its own transaction, so the samples of a request that is
+        rolled back are kept, in a stable row order so concurrent stores
+        cannot deadlock.
+        """
+        if not stacks:
+            return
+
+        rows = sorted(
+            (route, hashlib.md5(stack.encode()).hexdigest(), stack, samples)
+            for stack, samples in stacks.items()
+        )
+        try:
+            with self.env.registry.cursor() as cr:
+                execute_values(
+                    cr._obj,
+                    """
+                    INSERT INTO service_profile (route, stack_hash, stack, samples)
+                    VALUES %s
+                    ON CONFLICT (route, stack_hash) DO UPDATE
+                        SET samples = service_profile.samples + EXCLUDED.samples
+                    """,
+                    rows,
+                )
+        except Exception as e:
+            _logger.warning(f"Could not store the profile of {route}: {str(e)}")
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, time, timedelta
+from odoo import _
+from odoo.exceptions import UserError
+import logging
+import pytz
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_logger = logging.getLogger(__name__)
+
+
+class UtilizationService:
+    def __init__(self, env):
+        self.env = env
+
+    def get_utilization(self, date_from, date_to, services=None, tz_name=None):
+        """Capacity utilization per service, weekday and hour of day.
+
+        Covers the local days ``date_from`` to ``date_to`` (inclusive) in
+        ``tz_name``. Appointment intervals are loaded as arrays in a single
+        query and folded into hourly buckets by the occupancy engine.
+        """
+        if np is None:
+            raise UserError(
+                _("The capacity utilization report requires the numpy library.")
+            )
+
+        from .occupancy import occupancy_timeline, weekly_histogram, utilization
+
+        if date_to < date_from:
+            raise UserError(_("The end date must be on or after the start date."))
+
+        if services is None:
+            services = self.env["booking.service"].search([])
+        services = services.sorted("id")
+        if not services:
+            return []
+
+        timezone = pytz.timezone(tz_name or self.env.user.tz or "UTC")
+        range_start = self._to_utc(timezone, date_from)
+        range_end = self._to_utc(timezone, date_to + timedelta(days=1))
+        n_buckets = int((range_end - range_start).total_seconds() // 3600)
+
+        service_ids, starts, ends = self._load_intervals(services, range_start, range_end)
+
+        epoch_start = pytz.UTC.localize(range_start).timestamp()
+        groups = np.searchsorted(np.array(services.ids), service_ids)
+        timeline = occupancy_timeline(
+            groups,
+            (starts - epoch_start) / 3600.0,
+            (ends - epoch_start) / 3600.0,
+            len(services),
+            n_buckets,
+        )
+
+        booked, hours = weekly_histogram(
+            timeline, self._week_slots(timezone, range_start, n_buckets)
+        )
+        average, ratio = utilization(
+            booked, hours, services.mapped("max_concurrent_bookings")
+        )
+
+        result = []
+        for index, service in enumerate(services):
+            slots = []
+            for slot in np.flatnonzero(hours):
+                slots.append(
+                    {
+                        "weekday": int(slot // 24),
+                        "hour": int(slot % 24),
+                        "average_bookings": float(average[index, slot]),
+                        "utilization": None
+                        if np.isnan(ratio[index, slot])
+                        else float(ratio[index, slot]),
+                    }
+                )
+
+            result.append(
+                {
+                    "service_id": service.id,
+                    "service_name": service.name,
+                    "max_capacity": service.max_concurrent_bookings,
+                    "slots": slots,
+                }
+            )
+
+        return result
+
+    def _load_intervals(self, services, range_start, range_end):
+        """Fetch ``(service_id, start, end)`` epoch arrays of occupying appointments."""
+        for model in ("service.appointment", "service.appointment.archive"):
+            self.env[model].flush_model(
+                ["service_id", "booking_date", "end_date", "state"]
+            )
+
+        params = {"ids": services.ids, "start": range_start, "end": range_end}
+        self.env.cr.execute(
+            """
+            SELECT service_id,
+                   EXTRACT(EPOCH FROM booking_date),
+                   EXTRACT(EPOCH FROM end_date)
+              FROM service_appointment
+             WHERE service_id = ANY(%(ids)s)
+               AND state != 'cancel'
+               AND booking_date < %(end)s
+               AND end_date > %(start)s
+         UNION ALL
+            SELECT service_id,
+                   EXTRACT(EPOCH FROM booking_date),
+                   EXTRACT(EPOCH FROM end_date)
+              FROM service_appointment_archive
+             WHERE service_id = ANY(%(ids)s)
+               AND state != 'cancel'
+               AND booking_date < %(end)s
+               AND end_date > %(start)s
+            """,
+            params,
+        )
+        rows = np.array(self.env.cr.fetchall(), dtype=np.float64).reshape(-1, 3)
+
+        _logger.debug("Utilization report loaded %d intervals", len(rows))
+
+        return rows[:, 0].astype(np.int64), rows[:, 1], rows[:, 2]
+
+    def _to_utc(self, timezone, day):
+        """Naive UTC datetime of local midnight of ``day``."""
+        local = timezone.localize(datetime.combine(day, time.min))
+        return local.astimezone(pytz.UTC).replace(tzinfo=None)
+
+    def _week_slots(self, timezone, range_start, n_buckets):
+        """Local ``weekday * 24 + hour`` of every hourly bucket of the range."""
+        start = pytz.UTC.localize(range_start)
+        slots = np.empty(n_buckets, dtype=np.int64)
+        for bucket in range(n_buckets):
+            local = (start + timedelta(hours=bucket)).astimezone(timezone)
+            slots[bucket] = local.weekday() * 24 + local.hour
+        return slots
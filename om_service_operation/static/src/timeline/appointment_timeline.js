@@ -0,0 +1,233 @@
+/** @odoo-module **/
+// Staff timeline: one row per service over the visible day or week.
+// Only the appointments of the window are read, services are loaded page
+// by page as the list is scrolled, and each row shows how much of
+// max_concurrent_bookings is taken along the window.
+
+import {
+  Component,
+  onMounted,
+  onWillStart,
+  onWillUnmount,
+  useRef,
+  useState,
+} from "@odoo/owl";
+import { deserializeDateTime, serializeDateTime } from "@web/core/l10n/dates";
+import { registry } from "@web/core/registry";
+import { useService } from "@web/core/utils/hooks";
+
+const { DateTime } = luxon;
+
+// Services requested per page
+const TIMELINE_PAGE_SIZE = 20;
+
+// Distance from the end of the list at which the next page is requested
+const TIMELINE_PREFETCH_MARGIN = 300;
+
+export class AppointmentTimeline extends Component {
+  static template = "om_service_operation.AppointmentTimeline";
+  static props = ["*"];
+
+  setup() {
+    this.orm = useService("orm");
+    this.action = useService("action");
+    this.sentinel = useRef("sentinel");
+
+    this.state = useState({
+      scale: "week",
+      anchor: DateTime.local().startOf("day"),
+      services: [],
+      hasMore: false,
+      loading: false,
+    });
+    // Incremented on each window change so late pages are dropped
+    this.generation = 0;
+
+    onWillStart(() => this.reload());
+
+    onMounted(() => {
+      this.observer = new IntersectionObserver(
+        (entries) => {
+          if (entries.some((entry) => entry.isIntersecting)) {
+            this.loadMore();
+          }
+        },
+        { rootMargin: `0px 0px ${TIMELINE_PREFETCH_MARGIN}px 0px` }
+      );
+      this.observer.observe(this.sentinel.el);
+    });
+    onWillUnmount(() => this.observer && this.observer.disconnect());
+  }
+
+  get windowStart() {
+    return this.state.scale === "week"
+      ? this.state.anchor.startOf("week")
+      : this.state.anchor.startOf("day");
+  }
+
+  get windowEnd() {
+    return this.windowStart.plus(
+      this.state.scale === "week" ? { weeks: 1 } : { days: 1 }
+    );
+  }
+
+  get title() {
+    const start = this.windowStart;
+    if (this.state.scale === "day") {
+      return start.toLocaleString(DateTime.DATE_HUGE);
+    }
+    const last = this.windowEnd.minus({ days: 1 });
+    return `${start.toLocaleString(DateTime.DATE_MED)} - ${last.toLocaleString(
+      DateTime.DATE_MED
+    )}`;
+  }
+
+  /** Column headers: the hours of the day, or the days of the week. */
+  get ticks() {
+    const ticks = [];
+    const step = this.state.scale === "week" ? { days: 1 } : { hours: 2 };
+    const format = this.state.scale === "week" ? "ccc d" : "HH:mm";
+    let tick = this.windowStart;
+    while (tick < this.windowEnd) {
+      ticks.push({
+        key: tick.toMillis(),
+        label: tick.toFormat(format),
+        left: this.offset(tick),
+      });
+      tick = tick.plus(step);
+    }
+    return ticks;
+  }
+
+  async reload() {
+    const generation = ++this.generation;
+    this.state.services = [];
+    this.state.hasMore = false;
+    await this.fetchPage(generation);
+  }
+
+  async loadMore() {
+    if (this.state.loading || !this.state.hasMore) {
+      return;
+    }
+    await this.fetchPage(this.generation);
+  }
+
+  async fetchPage(generation) {
+    this.state.loading = true;
+    try {
+      const page = await this.orm.call(
+        "service.appointment",
+        "get_timeline_window",
+        [
+          serializeDateTime(this.windowStart),
+          serializeDateTime(this.windowEnd),
+        ],
+        { offset: this.state.services.length, limit: TIMELINE_PAGE_SIZE }
+      );
+      if (generation !== this.generation) {
+        return;
+      }
+      this.state.services.push(
+        ...page.services.map((service) => this.prepareRow(service))
+      );
+      this.state.hasMore = page.has_more;
+    } finally {
+      if (generation === this.generation) {
+        this.state.loading = false;
+      }
+    }
+    // A short page may leave the end of the list in view
+    if (
+      generation === this.generation &&
+      this.state.hasMore &&
+      this.sentinel.el &&
+      this.sentinel.el.getBoundingClientRect().top <
+        window.innerHeight + TIMELINE_PREFETCH_MARGIN
+    ) {
+      await this.loadMore();
+    }
+  }
+
+  /** Position the appointments and capacity segments of a service row. */
+  prepareRow(service) {
+    const capacity = service.max_concurrent_bookings;
+    return {
+      ...service,
+      lanes: Math.max(service.lanes, 1),
+      usage: capacity ? `${service.peak}/${capacity}` : `${service.peak}`,
+      full: Boolean(capacity) && service.peak >= capacity,
+      appointments: service.appointments.map((appointment) => ({
+        ...appointment,
+        ...this.span(appointment.start, appointment.end),
+      })),
+      capacity: service.capacity.map((segment) => ({
+        ...segment,
+        ...this.span(segment.start, segment.end),
+        level: !capacity
+          ? "free"
+          : segment.bookings >= capacity
+          ? "full"
+          : segment.bookings / capacity >= 0.5
+          ? "busy"
+          : "free",
+        label: capacity
+          ? `${segment.bookings}/${capacity}`
+          : `${segment.bookings}`,
+      })),
+    };
+  }
+
+  /** Left offset and width (percent of the window) of a UTC interval. */
+  span(start, end) {
+    const left = this.offset(deserializeDateTime(start));
+    const right = this.offset(deserializeDateTime(end));
+    return { left, width: Math.max(right - left, 0.2) };
+  }
+
+  offset(moment) {
+    const total = this.windowEnd.toMillis() - this.windowStart.toMillis();
+    const position =
+      ((moment.toMillis() - this.windowStart.toMillis()) / total) * 100;
+    return Math.min(Math.max(position, 0), 100);
+  }
+
+  formatTime(value) {
+    return deserializeDateTime(value).toFormat("ccc HH:mm");
+  }
+
+  setScale(scale) {
+    if (scale !== this.state.scale) {
+      this.state.scale = scale;
+      this.reload();
+    }
+  }
+
+  move(direction) {
+    const step = this.state.scale === "week" ? { weeks: 1 } : { days: 1 };
+    this.state.anchor =
+      direction > 0
+        ? this.state.anchor.plus(step)
+        : this.state.anchor.minus(step);
+    this.reload();
+  }
+
+  today() {
+    this.state.anchor = DateTime.local().startOf("day");
+    this.reload();
+  }
+
+  openAppointment(appointment) {
+    this.action.doAction({
+      type: "ir.actions.act_window",
+      res_model: "service.appointment",
+      res_id: appointment.id,
+      views: [[false, "form"]],
+      target: "current",
+    });
+  }
+}
+
+registry
+  .category("actions")
+  .add("om_service_operation.appointment_timeline", AppointmentTimeline);
@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+from . import service_utilization_report
+from . import service_appointment_recurrence
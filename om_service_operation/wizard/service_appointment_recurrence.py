@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api, _
+from odoo.addons.base.models.res_partner import _tz_get
+from odoo.exceptions import UserError
+from datetime import datetime, time, timedelta
+from dateutil.relativedelta import relativedelta
+from dateutil.rrule import rrule, DAILY, WEEKLY, MONTHLY
+from itertools import islice
+import pytz
+
+RRULE_FREQUENCIES = {"daily": DAILY, "weekly": WEEKLY, "monthly": MONTHLY}
+
+# Upper bound of occurrences generated by one series
+MAX_OCCURRENCES = 200
+
+
+class ServiceAppointmentRecurrence(models.TransientModel):
+    _name = "service.appointment.recurrence"
+    _description = "Recurring Appointment Series"
+
+    appointment_id = fields.Many2one(
+        "service.appointment",
+        string="Appointment",
+        required=True,
+        readonly=True,
+        ondelete="cascade",
+        help="First occurrence of the series",
+    )
+
+    rule_type = fields.Selection(
+        [
+            ("daily", "Days"),
+            ("weekly", "Weeks"),
+            ("monthly", "Months"),
+        ],
+        string="Repeat Every",
+        required=True,
+        default="weekly",
+    )
+
+    interval = fields.Integer(string="Interval", required=True, default=1)
+
+    end_type = fields.Selection(
+        [
+            ("count", "Number of Occurrences"),
+            ("until", "End Date"),
+        ],
+        string="Until",
+        required=True,
+        default="count",
+    )
+
+    count = fields.Integer(
+        string="Occurrences",
+        default=4,
+        help="Number of appointments in the series, this one included",
+    )
+
+    until = fields.Date(
+        string="End Date",
+        default=lambda self: fields.Date.context_today(self) + relativedelta(months=3),
+    )
+
+    tz = fields.Selection(
+        _tz_get,
+        string="Timezone",
+        required=True,
+        default=lambda self: self.env.user.tz or "UTC",
+        help="Occurrences keep the local time of the first appointment in this timezone",
+    )
+
+    occurrence_count = fields.Integer(
+        string="New Appointments", compute="_compute_occurrences"
+    )
+
+    conflict_count = fields.Integer(string="Conflicts", compute="_compute_occurrences")
+
+    conflict_summary = fields.Text(
+        string="Conflicting Dates", compute="_compute_occurrences"
+    )
+
+    @api.depends(
+        "appointment_id", "rule_type", "interval", "end_type", "count", "until", "tz"
+    )
+    def _compute_occurrences(self):
+        """Preview how many occurrences can be booked and which dates conflict."""
+        for wizard in self:
+            results = wizard._check_occurrences()
+            conflicts = [result for result in results if not result["available"]]
+
+            wizard.occurrence_count = len(results) - len(conflicts)
+            wizard.conflict_count = len(conflicts)
+            wizard.conflict_summary = "\n".join(
+                wizard._format_local(result["start"]) for result in conflicts
+            )
+
+    def _get_occurrence_dates(self):
+        """Naive UTC start dates of the occurrences after the first one."""
+        self.ensure_one()
+        appointment = self.appointment_id
+        if not appointment.booking_date or self.interval < 1:
+            return []
+        if self.end_type == "count" and self.count < 2:
+            return []
+        if self.end_type == "until" and not self.until:
+            return []
+
+        # Recur on local wall-clock time so daylight saving does not shift bookings
+        timezone = pytz.timezone(self.tz or "UTC")
+        first = pytz.UTC.localize(appointment.booking_date).astimezone(timezone)
+
+        rule_values = {
+            "dtstart": first.replace(tzinfo=None),
+            "interval": self.interval,
+        }
+        if self.end_type == "count":
+            rule_values["count"] = self.count
+        else:
+            rule_values["until"] = datetime.combine(self.until, time.max)
+
+        # Skip the first occurrence: it is the appointment itself
+        occurrences = islice(
+            rrule(RRULE_FREQUENCIES[self.rule_type], **rule_values),
+            1,
+            MAX_OCCURRENCES + 1,
+        )
+        return [
+            timezone.localize(local).astimezone(pytz.UTC).replace(tzinfo=None)
+            for local in occurrences
+        ]
+
+    def _check_occurrences(self):
+        """Check all occurrences against the schedule in one ordered scan."""
+        self.ensure_one()
+        service = self.appointment_id.service_id
+        dates = self._get_occurrence_dates()
+        if not service or not dates:
+            return []
+
+        from odoo.addons.om_service_operation.services.appointment_service import (
+            AppointmentService,
+        )
+
+        duration = timedelta(hours=service.duration)
+        return AppointmentService(self.env).check_availability_batch(
+            service, [(start, start + duration) for start in dates]
+        )
+
+    def _format_local(self, value):
+        """Format a naive UTC datetime in the wizard's timezone."""
+        timezone = pytz.timezone(self.tz or "UTC")
+        return pytz.UTC.localize(value).astimezone(timezone).strftime("%Y-%m-%d %H:%M")
+
+    def action_create_series(self):
+        """Create the available occurrences in one batch and open the series."""
+        self.ensure_one()
+        appointment = self.appointment_id
+
+        if appointment.state not in ("draft", "confirmed"):
+            raise UserError(
+                _("Only draft or confirmed appointments can be repeated.")
+            )
+
+        results = self._check_occurrences()
+        available = [result for result in results if result["available"]]
+        if not available:
+            raise UserError(_("None of the occurrences can be booked."))
+
+        occurrences = self.env["service.appointment"].create(
+            [
+                {
+                    "customer_id": appointment.customer_id.id,
+                    "service_id": appointment.service_id.id,
+                    "booking_date": result["start"],
+                    "notes": appointment.notes,
+                    "state": appointment.state,
+                    "series_origin_id": appointment.id,
+                }
+                for result in available
+            ]
+        )
+
+        body = _("Recurring series: %s appointment(s) created.") % len(occurrences)
+        if len(available) < len(results):
+            body += "\n" + _("Skipped (slot full): %s") % ", ".join(
+                self._format_local(result["start"])
+                for result in results
+                if not result["available"]
+            )
+        appointment._post_chatter(body=body, subject=_("Recurring Series"))
+
+        return appointment.action_view_series()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, _
+from odoo.addons.base.models.res_partner import _tz_get
+from datetime import timedelta
+
+WEEKDAY_SELECTION = [
+    ("0", "Monday"),
+    ("1", "Tuesday"),
+    ("2", "Wednesday"),
+    ("3", "Thursday"),
+    ("4", "Friday"),
+    ("5", "Saturday"),
+    ("6", "Sunday"),
+]
+
+
+class ServiceUtilizationReport(models.TransientModel):
+    _name = "service.utilization.report"
+    _description = "Capacity Utilization Report"
+
+    date_from = fields.Date(
+        string="From",
+        required=True,
+        default=lambda self: fields.Date.context_today(self) - timedelta(days=365),
+    )
+
+    date_to = fields.Date(
+        string="To", required=True, default=lambda self: fields.Date.context_today(self)
+    )
+
+    service_ids = fields.Many2many(
+        "booking.service",
+        string="Services",
+        help="Leave empty to report on all services",
+    )
+
+    tz = fields.Selection(
+        _tz_get,
+        string="Timezone",
+        default=lambda self: self.env.user.tz or "UTC",
+        required=True,
+        help="Timezone used to place bookings on weekdays and hours",
+    )
+
+    line_ids = fields.One2many(
+        "service.utilization.report.line", "report_id", string="Lines"
+    )
+
+    def action_compute(self):
+        """Compute utilization and open the result as a pivot."""
+        self.ensure_one()
+
+        from odoo.addons.om_service_operation.services.utilization_service import (
+            UtilizationService,
+        )
+
+        result = UtilizationService(self.env).get_utilization(
+            self.date_from,
+            self.date_to,
+            services=self.service_ids or None,
+            tz_name=self.tz,
+        )
+
+        self.line_ids.unlink()
+        self.env["service.utilization.report.line"].create(
+            [
+                {
+                    "report_id": self.id,
+                    "service_id": service["service_id"],
+                    "weekday": str(slot["weekday"]),
+                    "hour": slot["hour"],
+                    "average_bookings": slot["average_bookings"],
+                    "utilization": slot["utilization"] * 100
+                    if slot["utilization"] is not None
+                    else 0.0,
+                }
+                for service in result
+                for slot in service["slots"]
+            ]
+        )
+
+        return {
+            "name": _("Capacity Utilization"),
+            "type": "ir.actions.act_window",
+            "res_model": "service.utilization.report.line",
+            "view_mode": "pivot,graph,list",
+            "domain": [("report_id", "=", self.id)],
+            "target": "current",
+        }
+
+
+class ServiceUtilizationReportLine(models.TransientModel):
+    _name = "service.utilization.report.line"
+    _description = "Capacity Utilization Report Line"
+    _order = "service_id, weekday, hour"
+
+    report_id = fields.Many2one(
+        "service.utilization.report", required=True, ondelete="cascade"
+    )
+
+    service_id = fields.Many2one("booking.service", string="Service", readonly=True)
+
+    weekday = fields.Selection(WEEKDAY_SELECTION, string="Weekday", readonly=True)
+
+    hour = fields.Integer(string="Hour", readonly=True, aggregator=None)
+
+    average_bookings = fields.Float(
+        string="Average Bookings",
+        readonly=True,
+        aggregator="avg",
+        help="Average number of concurrent bookings over this hour",
+    )
+
+    utilization = fields.Float(
+        string="Utilization (%)",
+        readonly=True,
+        aggregator="avg",
+        help="Average bookings relative to Max Concurrent Bookings "
+        "(0 for services with unlimited capacity)",
+    )
@@ -15,6 +15,7 @@
         * Smart button to view linked quotations
         * Automatic product and pricing integration
         * Prevent duplicate quotation creation
+        * Optional automatic quotations on confirmation, created in background batches
         
         Dependencies:
         -------------
@@ -26,7 +27,9 @@
     'depends': ['om_service_operation', 'sale_management'],
     'data': [
         'security/ir.model.access.csv',
+        'data/cron_jobs.xml',
         'views/appointment_view.xml',
+        'views/res_config_settings_views.xml',
     ],
     'license': 'LGPL-3',
     'installable': True,
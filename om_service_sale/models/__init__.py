@@ -1,2 +1,4 @@
 # -*- coding: utf-8 -*-
 from . import appointment
+from . import appointment_archive
+from . import res_config_settings
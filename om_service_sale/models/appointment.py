@@ -1,6 +1,19 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import str2bool
+from odoo.tools.sql import create_index
+from psycopg2.extras import execute_values
+from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Seconds to wait after a confirmation before draining the queue
+QUOTATION_QUEUE_DELAY = 60
+QUOTATION_QUEUE_BATCH_SIZE = 500
+# Failed attempts after which a queued appointment is dequeued
+QUOTATION_QUEUE_MAX_RETRIES = 3
 
 
 class ServiceAppointment(models.Model):
@@ -14,18 +27,203 @@ class ServiceAppointment(models.Model):
         help="Generated sale order for this appointment",
     )
 
+    sale_order_pending = fields.Boolean(
+        string="Quotation Pending",
+        readonly=True,
+        copy=False,
+        help="Queued for automatic quotation generation",
+    )
+
+    sale_order_retries = fields.Integer(
+        string="Quotation Attempts",
+        readonly=True,
+        copy=False,
+        help="Failed automatic quotation attempts",
+    )
+
+    sale_order_error = fields.Char(
+        string="Quotation Error",
+        readonly=True,
+        copy=False,
+        help="Why the last automatic quotation attempt failed",
+    )
+
     sale_order_count = fields.Integer(
         string="Sale Order Count",
         compute="_compute_sale_order_count",
         help="Number of sale orders linked to this appointment",
     )
 
+    def init(self):
+        """Partial index so the queue drain only scans pending appointments."""
+        super().init()
+        create_index(
+            self.env.cr,
+            "service_appointment_sale_order_pending_idx",
+            self._table,
+            ["id"],
+            where="sale_order_pending",
+        )
+
     @api.depends("sale_order_id")
     def _compute_sale_order_count(self):
         """Compute the number of linked sale orders."""
         for record in self:
             record.sale_order_count = 1 if record.sale_order_id else 0
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Queue quotations of appointments created confirmed."""
+        if self._is_auto_quotation_enabled():
+            for vals in vals_list:
+                if vals.get("state") == "confirmed":
+                    vals["sale_order_pending"] = True
+
+        records = super().create(vals_list)
+
+        if any(records.mapped("sale_order_pending")):
+            self._trigger_quotation_queue()
+
+        return records
+
+    def write(self, vals):
+        """Queue quotations when appointments become confirmed."""
+        if vals.get("state") == "confirmed" and self._is_auto_quotation_enabled():
+            vals = dict(vals, sale_order_pending=True)
+            result = super().write(vals)
+            self._trigger_quotation_queue()
+            return result
+
+        return super().write(vals)
+
+    @api.model
+    def _is_auto_quotation_enabled(self):
+        """Whether confirmed appointments are queued for automatic quotations."""
+        return str2bool(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("om_service_sale.auto_quotation", "False")
+        )
+
+    @api.model
+    def _trigger_quotation_queue(self):
+        """Wake the queue cron up after a short delay so confirmations batch up.
+
+        The trigger is added once per transaction, before it commits, however
+        many appointments are confirmed in it.
+        """
+        precommit = self.env.cr.precommit
+        if precommit.data.get("om_service_sale.quotation_queue_triggered"):
+            return
+        precommit.data["om_service_sale.quotation_queue_triggered"] = True
+
+        cron = self.env.ref(
+            "om_service_sale.cron_process_quotation_queue", raise_if_not_found=False
+        )
+        if cron:
+            precommit.add(
+                lambda: cron.sudo()._trigger(
+                    fields.Datetime.now() + timedelta(seconds=QUOTATION_QUEUE_DELAY)
+                )
+            )
+
+    @api.model
+    def _process_quotation_queue(self, limit=QUOTATION_QUEUE_BATCH_SIZE):
+        """Create quotations for one batch of queued appointments.
+
+        Appointments that already have a sale order (or cannot be billed) are
+        simply dequeued, so running the queue twice never duplicates orders.
+        When the batch fails, quotations are created one by one. Appointments
+        still failing stay queued with their error, behind the others, and are
+        dequeued after ``QUOTATION_QUEUE_MAX_RETRIES`` attempts, the error
+        staying on the appointment. Returns the number of processed
+        appointments.
+        """
+        pending = self.sudo().search(
+            [("sale_order_pending", "=", True)],
+            order="sale_order_retries, id",
+            limit=limit,
+        )
+        if not pending:
+            return 0
+
+        failed = {}
+        try:
+            with self.env.cr.savepoint():
+                orders, skipped = pending._create_sale_orders_grouped(
+                    group_by_customer=False
+                )
+        except Exception as e:
+            _logger.warning(
+                f"Cron: Queued quotations failed as a batch, creating them one by one: {str(e)}"
+            )
+            orders, skipped, failed = pending._create_sale_orders_one_by_one()
+
+        failed_records = pending.browse(list(failed))
+        (pending - failed_records).write(
+            {"sale_order_pending": False, "sale_order_error": False}
+        )
+        for record in failed_records:
+            retries = record.sale_order_retries + 1
+            record.write(
+                {
+                    "sale_order_retries": retries,
+                    "sale_order_error": failed[record.id],
+                    "sale_order_pending": retries < QUOTATION_QUEUE_MAX_RETRIES,
+                }
+            )
+
+        _logger.info(
+            f"Cron: Created {len(orders)} queued quotations, "
+            f"skipped {sum(len(records) for records in skipped.values())} appointments, "
+            f"{len(failed)} failed"
+        )
+
+        return len(pending)
+
+    def _create_sale_orders_one_by_one(self):
+        """Create one quotation per appointment, each in its own savepoint.
+
+        Returns ``(orders, skipped, failed)``, ``failed`` mapping the id of
+        the appointments whose quotation could not be created to the error.
+        """
+        orders = self.env["sale.order"]
+        skipped = {}
+        failed = {}
+
+        for record in self:
+            try:
+                with self.env.cr.savepoint():
+                    record_orders, record_skipped = record._create_sale_orders_grouped(
+                        group_by_customer=False
+                    )
+            except Exception as e:
+                _logger.error(
+                    f"Cron: Could not create the quotation of {record.reference}: {str(e)}"
+                )
+                failed[record.id] = str(e)
+                continue
+
+            orders |= record_orders
+            for reason, records in record_skipped.items():
+                skipped[reason] = skipped.get(reason, self.browse()) | records
+
+        return orders, skipped, failed
+
+    def _cron_process_quotation_queue(self):
+        """Cron job draining the automatic quotation queue."""
+        count = self._process_quotation_queue()
+
+        if count >= QUOTATION_QUEUE_BATCH_SIZE:
+            self.env.ref("om_service_sale.cron_process_quotation_queue")._trigger()
+
+    def _prepare_archive_values(self):
+        """Keep the sale order link on archived appointments."""
+        vals_list = super()._prepare_archive_values()
+        for record, vals in zip(self, vals_list):
+            vals["sale_order_id"] = record.sale_order_id.id
+        return vals_list
+
     def action_create_sale_order(self):
         self.ensure_one()
 
@@ -56,18 +254,173 @@ class ServiceAppointment(models.Model):
                 % self.service_id.name
             )
 
-        SaleOrder = self.env["sale.order"]
+        sale_order = self.env["sale.order"].create(
+            self._prepare_sale_order_values(self.customer_id, self.currency_id)
+        )
+
+        self.write({"sale_order_id": sale_order.id})
+
+        self._post_chatter(
+            body=_("Sale Order %s created from this appointment.") % sale_order.name,
+            subject=_("Quotation Created"),
+        )
+
+        return {
+            "name": _("Sale Order"),
+            "type": "ir.actions.act_window",
+            "res_model": "sale.order",
+            "res_id": sale_order.id,
+            "view_mode": "form",
+            "target": "current",
+        }
+
+    def action_create_sale_orders_batch(self):
+        """Create one quotation per customer and currency for these appointments.
+
+        Appointments that are not confirmed, already linked to a sale order
+        or whose service has no product are skipped and reported.
+        """
+        orders, skipped = self._create_sale_orders_grouped()
+
+        message = _("%(orders)s quotation(s) created for %(count)s appointment(s).") % {
+            "orders": len(orders),
+            "count": len(self) - sum(len(records) for records in skipped.values()),
+        }
+        for reason, records in skipped.items():
+            if records:
+                message += "\n" + _("Skipped (%(reason)s): %(references)s") % {
+                    "reason": reason,
+                    "references": ", ".join(records.mapped("reference")),
+                }
+
+        next_action = {"type": "ir.actions.act_window_close"}
+        if orders:
+            next_action = {
+                "name": _("Quotations"),
+                "type": "ir.actions.act_window",
+                "res_model": "sale.order",
+                "view_mode": "list,form",
+                "domain": [("id", "in", orders.ids)],
+                "target": "current",
+            }
+
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Quotations Created"),
+                "message": message,
+                "type": "warning" if any(skipped.values()) else "success",
+                "sticky": any(skipped.values()),
+                "next": next_action,
+            },
+        }
+
+    def _create_sale_orders_grouped(self, group_by_customer=True):
+        """Create grouped quotations in one create and link them in one update.
+
+        Appointments are grouped per customer and currency, or get one
+        quotation each when ``group_by_customer`` is False. Returns
+        ``(orders, skipped)`` where ``skipped`` maps a reason to the
+        appointments left out.
+        """
+        not_confirmed = self.filtered(lambda record: record.state != "confirmed")
+        already_linked = (self - not_confirmed).filtered("sale_order_id")
+        no_product = (self - not_confirmed - already_linked).filtered(
+            lambda record: not record.service_id.product_id
+        )
+        billable = self - not_confirmed - already_linked - no_product
+
+        skipped = {
+            _("not confirmed"): not_confirmed,
+            _("quotation exists"): already_linked,
+            _("service without product"): no_product,
+        }
+
+        group_ids = {}
+        for record in billable.sorted("booking_date"):
+            if group_by_customer:
+                key = (record.customer_id, record.currency_id)
+            else:
+                key = (record.customer_id, record.currency_id, record.id)
+            group_ids.setdefault(key, []).append(record.id)
+        groups = {key: self.browse(ids) for key, ids in group_ids.items()}
+
+        if not groups:
+            return self.env["sale.order"], skipped
+
+        orders = self.env["sale.order"].create(
+            [
+                records._prepare_sale_order_values(key[0], key[1])
+                for key, records in groups.items()
+            ]
+        )
+
+        links = [
+            (appointment_id, order)
+            for records, order in zip(groups.values(), orders)
+            for appointment_id in records.ids
+        ]
+
+        # The bulk update below bypasses the ORM: enforce its access checks
+        billable.check_access("write")
+        self.env.flush_all()
+        execute_values(
+            self.env.cr._obj,
+            """
+            UPDATE service_appointment a
+               SET sale_order_id = v.order_id,
+                   write_uid = v.uid,
+                   write_date = now() at time zone 'UTC'
+              FROM (VALUES %s) AS v(appointment_id, order_id, uid)
+             WHERE a.id = v.appointment_id
+            """,
+            [(appointment_id, order.id, self.env.uid) for appointment_id, order in links],
+        )
+        billable.invalidate_recordset(
+            ["sale_order_id", "sale_order_count", "write_uid", "write_date"]
+        )
+
+        # The update above bypasses write(): log the links explicitly
+        Audit = self.env["service.appointment.audit"].sudo()
+        if Audit._is_enabled():
+            Audit._log(
+                [
+                    (appointment_id, "write", "sale_order_id", "", order.name)
+                    for appointment_id, order in links
+                ]
+            )
+
+        return orders, skipped
 
+    def _prepare_sale_order_values(self, customer, currency):
+        """Values of a quotation billing all appointments in ``self``."""
         order_vals = {
-            "partner_id": self.customer_id.id,
+            "partner_id": customer.id,
             "date_order": fields.Datetime.now(),
-            "note": _("Generated from Appointment: %s\nBooking Date: %s")
-            % (self.reference, self.booking_date),
+            "note": "\n".join(
+                _("Generated from Appointment: %s\nBooking Date: %s")
+                % (record.reference, record.booking_date)
+                for record in self
+            ),
+            "order_line": [
+                fields.Command.create(record._prepare_sale_order_line_values())
+                for record in self
+            ],
         }
 
-        sale_order = SaleOrder.create(order_vals)
+        # Keep the customer's pricelist unless it bills another currency
+        partner_pricelist = customer.property_product_pricelist
+        if currency and partner_pricelist.currency_id != currency:
+            pricelist = self._get_sale_pricelist(currency)
+            if pricelist:
+                order_vals["pricelist_id"] = pricelist.id
+
+        return order_vals
 
-        line_vals = {
+    def _prepare_sale_order_line_values(self):
+        self.ensure_one()
+        return {
             "product_id": self.service_id.product_id.id,
             "product_uom_qty": 1.0,
             "price_unit": self.service_id.price,
@@ -82,24 +435,19 @@ class ServiceAppointment(models.Model):
             ),
         }
 
-        sale_order.write({"order_line": [fields.Command.create(line_vals)]})
-
-        self.write({"sale_order_id": sale_order.id})
-
-        self.message_post(
-            body=_("Sale Order %s created from this appointment.") % sale_order.name,
-            subject=_("Quotation Created"),
+    def _get_sale_pricelist(self, currency):
+        """First pricelist in ``currency`` for quotations (by sequence), if any."""
+        if not currency:
+            return self.env["product.pricelist"]
+        return self.env["product.pricelist"].search(
+            [
+                ("currency_id", "=", currency.id),
+                ("company_id", "in", [False, self.env.company.id]),
+            ],
+            order="sequence, id",
+            limit=1,
         )
 
-        return {
-            "name": _("Sale Order"),
-            "type": "ir.actions.act_window",
-            "res_model": "sale.order",
-            "res_id": sale_order.id,
-            "view_mode": "form",
-            "target": "current",
-        }
-
     def action_view_sale_order(self):
         self.ensure_one()
 
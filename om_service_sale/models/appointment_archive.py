@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields
+
+
+class ServiceAppointmentArchive(models.Model):
+    _inherit = "service.appointment.archive"
+
+    sale_order_id = fields.Many2one(
+        "sale.order",
+        string="Sale Order",
+        readonly=True,
+        help="Sale order generated for the appointment before it was archived",
+    )
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields
+
+
+class ResConfigSettings(models.TransientModel):
+    _inherit = "res.config.settings"
+
+    appointment_auto_quotation = fields.Boolean(
+        string="Automatic Quotations",
+        config_parameter="om_service_sale.auto_quotation",
+        help="Queue a quotation for every appointment that gets confirmed. "
+        "Queued quotations are created in batches in the background.",
+    )
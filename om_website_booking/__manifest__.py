@@ -14,7 +14,9 @@
         * Public service catalog
         * Online booking form
         * Real-time availability
+        * Live slot updates pushed over the bus
         * Confirmation page
+        * Sampled profiling of the booking routes (see om_service_operation)
         * Responsive design
         * Mobile-friendly interface
         
@@ -23,7 +25,7 @@
     """,
     'author': 'Truong Hiep',
     'website': '',
-    'depends': ['om_service_operation', 'website', 'portal'],
+    'depends': ['om_service_operation', 'website', 'portal', 'bus'],
     'data': [
         # Booking Templates (Split for better organization)
         'views/booking/catalog.xml',
@@ -38,6 +40,8 @@
         'web.assets_frontend': [
             'om_website_booking/static/src/css/booking.css',
             'om_website_booking/static/src/js/booking.js',
+            'om_website_booking/static/src/js/catalog.js',
+            'om_website_booking/static/src/js/booking_live.js',
         ],
     },
     'images': [],
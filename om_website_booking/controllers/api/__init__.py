@@ -1,2 +1,5 @@
 # -*- coding: utf-8 -*-
 from . import availability_api
+from . import utilization_api
+from . import metrics_api
+from . import catalog_api
@@ -6,10 +6,26 @@ JSON API endpoints for checking time slot availability.
 Separated from main controller for better organization.
 """
 
-from odoo import http
+from odoo import http, fields
+from odoo.exceptions import ValidationError
 from odoo.http import request
 from datetime import datetime, timedelta
 import pytz
+import time
+
+from odoo.addons.om_service_operation.services.appointment_service import (
+    AppointmentService,
+    BUSINESS_HOURS,
+    peak_concurrency,
+)
+from odoo.addons.om_service_operation.services.metrics_service import MetricsService
+
+from ..main import HOLD_SESSION_KEY
+from ..replica import use_replica
+
+# Bounds of the next available slots search
+MAX_SEARCH_HORIZON_DAYS = 90
+MAX_SEARCH_RESULTS = 20
 
 
 class AvailabilityAPI(http.Controller):
@@ -19,7 +35,8 @@ class AvailabilityAPI(http.Controller):
     Provides JSON endpoints for frontend AJAX calls.
     """
     
-    @http.route('/booking/check_availability', type='json', auth='public', methods=['POST'])
+    @http.route('/booking/check_availability', type='json', auth='public', methods=['POST'],
+                readonly=use_replica)
     def check_availability(self, service_id, date, **kwargs):
         """
         Check time slot availability for a specific service and date.
@@ -28,9 +45,13 @@ class AvailabilityAPI(http.Controller):
             service_id: ID of the service
             date: Date string in YYYY-MM-DD format
             
+        The visitor's own slot hold (kept in the session) is not counted
+        against the capacity.
+            
         Returns:
             JSON with available time slots and their status
         """
+        started = time.perf_counter()
         try:
             # Get user's timezone (default to UTC+7 for Vietnam)
             user_tz = request.env.user.tz or 'Asia/Ho_Chi_Minh'
@@ -45,15 +66,15 @@ class AvailabilityAPI(http.Controller):
                 return {'error': 'Service not found'}
             
             # Define time slots (8 AM to 5 PM, hourly)
-            business_hours = list(range(8, 17))  # 8:00 to 16:00 (last slot at 4 PM)
+            business_hours = list(BUSINESS_HOURS)  # 8:00 to 16:00 (last slot at 4 PM)
             
             slots = []
-            Appointment = request.env['service.appointment'].sudo()
             
             # Get current time in user's timezone
             now_utc = datetime.now(pytz.UTC)
             now_local = now_utc.astimezone(timezone)
             
+            slot_bounds = []
             for hour in business_hours:
                 # Create datetime in user's LOCAL timezone
                 slot_datetime_naive = datetime.combine(selected_date, datetime.min.time())
@@ -62,60 +83,216 @@ class AvailabilityAPI(http.Controller):
                 # Localize to user's timezone
                 slot_datetime_local = timezone.localize(slot_datetime_naive)
                 
-                # Convert to UTC for Odoo (Odoo stores in UTC)
-                slot_datetime_utc = slot_datetime_local.astimezone(pytz.UTC)
-                
-                # Remove timezone info for Odoo (naive datetime)
-                slot_datetime = slot_datetime_utc.replace(tzinfo=None)
+                # Convert to UTC for Odoo (Odoo stores in UTC), without tzinfo
+                slot_datetime = slot_datetime_local.astimezone(pytz.UTC).replace(tzinfo=None)
                 
                 # Calculate end time
                 end_datetime = slot_datetime + timedelta(hours=service.duration)
                 
+                slot_bounds.append((slot_datetime_local, slot_datetime, end_datetime))
+            
+            # One capacity timeline for the whole day (appointments and
+            # other visitors' holds), shared with the backend overlap check
+            appointment_service = AppointmentService(request.env)
+            timeline = appointment_service.get_capacity_timeline(
+                service,
+                slot_bounds[0][1],
+                max(bounds[2] for bounds in slot_bounds),
+                exclude_hold=request.session.get(HOLD_SESSION_KEY),
+            )
+            max_capacity = service.max_concurrent_bookings
+            
+            for slot_datetime_local, slot_datetime, end_datetime in slot_bounds:
                 # Check if slot is in the past (compare in local timezone)
                 is_past = slot_datetime_local < now_local
                 
-                # Check availability
-                has_overlap, _, error_msg = Appointment.check_overlap(
-                    booking_date=slot_datetime,
-                    end_date=end_datetime,
-                    service_id=service.id
-                )
-                
-                # Count current bookings for this slot
-                current_bookings = Appointment.search_count([
-                    ('service_id', '=', service.id),
-                    ('state', 'not in', ['cancel']),
-                    '|',
-                    '&',
-                    ('booking_date', '<', end_datetime),
-                    ('end_date', '>', slot_datetime),
-                    '&',
-                    ('booking_date', '=', slot_datetime),
-                    ('end_date', '=', end_datetime),
-                ])
+                # Peak number of concurrent bookings during this slot
+                current_bookings = peak_concurrency(timeline, slot_datetime, end_datetime)
+                is_full = bool(max_capacity) and current_bookings >= max_capacity
                 
                 # Return LOCAL time for display (frontend will show this)
                 slot_info = {
                     'time': slot_datetime_local.strftime('%H:%M'),
                     'display': slot_datetime_local.strftime('%I:%M %p'),  # 08:00 AM
                     'datetime': slot_datetime_local.strftime('%Y-%m-%dT%H:%M'),  # Local time for frontend
-                    'available': not has_overlap and not is_past,
+                    'available': not is_full and not is_past,
                     'is_past': is_past,
-                    'is_full': has_overlap,
+                    'is_full': is_full,
                     'current_bookings': current_bookings,
-                    'max_capacity': service.max_concurrent_bookings,
+                    'max_capacity': max_capacity,
+                    # UTC bounds let the page apply pushed occupancy deltas
+                    'start_utc': fields.Datetime.to_string(slot_datetime),
+                    'end_utc': fields.Datetime.to_string(end_datetime),
                 }
                 
                 slots.append(slot_info)
             
+            # Bus channels the page subscribes to for live slot updates
+            channels = appointment_service.get_slot_channels(
+                service.id,
+                fields.Datetime.to_datetime(slots[0]['start_utc']),
+                fields.Datetime.to_datetime(slots[-1]['end_utc']),
+            ) if slots else []
+            
             return {
                 'slots': slots,
+                'service_id': service.id,
                 'service_name': service.name,
                 'duration': service.duration,
                 'timezone': user_tz,
+                'channels': channels,
+                # Free capacity over the day, in UTC
+                'capacity_timeline': [
+                    {
+                        'start': fields.Datetime.to_string(segment['start']),
+                        'end': fields.Datetime.to_string(segment['end']),
+                        'bookings': segment['bookings'],
+                        'free': segment['free'],
+                    }
+                    for segment in timeline
+                ],
             }
             
         except Exception as e:
             import traceback
             traceback.print_exc()
             return {'error': str(e)}
+        
+        finally:
+            MetricsService(request.env).observe(
+                'booking_availability_request_seconds', time.perf_counter() - started
+            )
+    
+    @http.route('/booking/next_available', type='json', auth='public', methods=['POST'],
+                readonly=use_replica)
+    def next_available(self, service_id, date=None, horizon_days=30, limit=5, **kwargs):
+        """
+        Find the earliest free time slots of a service.
+        
+        Walks the gaps between the existing appointments in one ordered
+        scan instead of probing day by day, and stops as soon as enough
+        slots are found.
+        
+        Args:
+            service_id: ID of the service
+            date: Optional first day to search (YYYY-MM-DD), defaults to now
+            horizon_days: Number of days to search (max 90)
+            limit: Number of slots to return (max 20)
+            
+        Returns:
+            JSON with the first free slots in chronological order
+        """
+        try:
+            user_tz = request.env.user.tz or 'Asia/Ho_Chi_Minh'
+            timezone = pytz.timezone(user_tz)
+            
+            service = request.env['booking.service'].sudo().browse(int(service_id))
+            if not service.exists() or not service.active:
+                return {'error': 'Service not found'}
+            
+            horizon_days = min(max(int(horizon_days), 1), MAX_SEARCH_HORIZON_DAYS)
+            limit = min(max(int(limit), 1), MAX_SEARCH_RESULTS)
+            
+            # Never search in the past
+            now = datetime.now().replace(microsecond=0)
+            start = now
+            if date:
+                day_start = timezone.localize(
+                    datetime.strptime(date, '%Y-%m-%d')
+                ).astimezone(pytz.UTC).replace(tzinfo=None)
+                start = max(day_start, now)
+            end = start + timedelta(days=horizon_days)
+            
+            free_slots = AppointmentService(request.env).find_free_slots(
+                service.sudo(),
+                start,
+                end,
+                limit=limit,
+                tz_name=user_tz,
+                exclude_hold=request.session.get(HOLD_SESSION_KEY),
+            )
+            
+            slots = []
+            for slot in free_slots:
+                slot_local = pytz.UTC.localize(slot['start']).astimezone(timezone)
+                slots.append({
+                    'date': slot_local.strftime('%Y-%m-%d'),
+                    'time': slot_local.strftime('%H:%M'),
+                    'display': slot_local.strftime('%a %d %b, %I:%M %p'),
+                    'datetime': slot_local.strftime('%Y-%m-%dT%H:%M'),
+                    'current_bookings': slot['bookings'],
+                    'max_capacity': service.max_concurrent_bookings,
+                    'start_utc': fields.Datetime.to_string(slot['start']),
+                    'end_utc': fields.Datetime.to_string(slot['end']),
+                })
+            
+            return {
+                'slots': slots,
+                'service_id': service.id,
+                'service_name': service.name,
+                'duration': service.duration,
+                'timezone': user_tz,
+                'searched_until': fields.Datetime.to_string(end),
+            }
+            
+        except ValueError:
+            return {'error': 'Invalid parameters'}
+    
+    @http.route('/booking/hold', type='json', auth='public', methods=['POST'])
+    def hold_slot(self, service_id, datetime_local, **kwargs):
+        """
+        Reserve a time slot while the visitor fills in the booking form.
+        
+        The hold token is kept in the visitor's session: the previous hold
+        of the session is released first, and a client address may only
+        hold a few slots at once.
+        
+        Args:
+            service_id: ID of the service
+            datetime_local: Slot start in YYYY-MM-DDTHH:MM (visitor's local time)
+            
+        Returns:
+            JSON with the hold token and expiry, or an error if the slot
+            has been taken in the meantime
+        """
+        try:
+            service = request.env['booking.service'].sudo().browse(int(service_id))
+            if not service.exists() or not service.active:
+                return {'error': 'Service not found'}
+            
+            # Same timezone handling as the booking form submission
+            user_tz = request.env.user.tz or 'Asia/Ho_Chi_Minh'
+            timezone = pytz.timezone(user_tz)
+            slot_local = timezone.localize(
+                datetime.strptime(datetime_local, '%Y-%m-%dT%H:%M')
+            )
+            booking_date = slot_local.astimezone(pytz.UTC).replace(tzinfo=None)
+            end_date = booking_date + timedelta(hours=service.duration)
+            
+            if booking_date < datetime.now():
+                return {'error': 'Cannot book appointments in the past.'}
+            
+            hold = request.env['service.appointment.hold'].sudo()._hold_slot(
+                service,
+                booking_date,
+                end_date,
+                previous_token=request.session.get(HOLD_SESSION_KEY),
+                client_ip=request.httprequest.remote_addr,
+            )
+            request.session[HOLD_SESSION_KEY] = hold.token or None
+            if not hold:
+                # Holds are disabled: nothing is reserved
+                return {'token': False}
+            
+            return {
+                'token': hold.token,
+                'hold_id': hold.id,
+                'expires_at': fields.Datetime.to_string(hold.expires_at),
+            }
+            
+        except ValidationError as e:
+            # The previous hold was released all the same
+            request.session.pop(HOLD_SESSION_KEY, None)
+            return {'error': str(e), 'unavailable': True}
+        except ValueError:
+            return {'error': 'Invalid date format'}
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Catalog API Controller
+
+JSON API endpoint returning the following pages of the service catalog,
+loaded by the catalog page as the visitor scrolls.
+"""
+
+from odoo import http
+from odoo.http import request
+from odoo.tools.misc import formatLang
+
+from ..main import search_catalog_page
+from ..replica import use_replica
+
+# Characters of the description shown on a card
+CARD_DESCRIPTION_LENGTH = 120
+
+
+class CatalogAPI(http.Controller):
+    """
+    API Controller for the Service Catalog.
+
+    Returns compact service cards instead of rendered HTML.
+    """
+
+    @http.route('/booking/services', type='json', auth='public', methods=['POST'],
+                website=True, readonly=use_replica)
+    def services(self, page=2, search='', **kwargs):
+        """
+        One page of service cards matching the catalog search.
+
+        Args:
+            page: Page number (24 services per page)
+            search: Optional text searched in name and description
+            price_min, price_max: Optional price range
+            duration_min, duration_max: Optional duration range (hours)
+
+        Returns:
+            JSON with the page's cards, the total number of matches and
+            the number of the next page (False on the last page)
+        """
+        catalog = search_catalog_page(search, page, kwargs)
+
+        return {
+            'services': [self._service_card(service) for service in catalog['services']],
+            'total': catalog['total'],
+            'page': catalog['page'],
+            'next_page': catalog['next_page'] or False,
+        }
+
+    def _service_card(self, service):
+        """Fields displayed on a catalog card, the image as a cacheable URL."""
+        description = service.description or ''
+        if len(description) > CARD_DESCRIPTION_LENGTH:
+            description = description[:CARD_DESCRIPTION_LENGTH] + '...'
+
+        return {
+            'id': service.id,
+            'name': service.name,
+            'url': service.get_detail_url(),
+            'image_url': request.website.image_url(service, 'image', '512x512')
+            if service.image else False,
+            'description': description,
+            'duration_display': service.duration_display,
+            'price_display': formatLang(
+                request.env, service.price, currency_obj=service.currency_id
+            ),
+        }
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Metrics API Controller
+
+Prometheus scrape endpoint for the booking metrics.
+"""
+
+import hmac
+
+from odoo import http
+from odoo.http import request
+
+from odoo.addons.om_service_operation.services.metrics_service import MetricsService
+
+
+class MetricsAPI(http.Controller):
+    """
+    API Controller for Booking Metrics.
+
+    Restricted to scrapers presenting the configured bearer token and
+    to appointment managers.
+    """
+
+    @http.route('/booking/metrics', type='http', auth='public', methods=['GET'], csrf=False)
+    def metrics(self, **kwargs):
+        """
+        Booking metrics of all workers in the Prometheus text format.
+
+        Authenticate with ``Authorization: Bearer <token>``, the token
+        being set in Settings > Service Booking > Monitoring.
+
+        Returns:
+            text/plain exposition of the counters, histograms and gauges
+        """
+        if not self._is_authorized():
+            return request.make_response(
+                'Forbidden', headers=[('Content-Type', 'text/plain')], status=403
+            )
+
+        return request.make_response(
+            MetricsService(request.env(su=True)).export(),
+            headers=[('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')],
+        )
+
+    def _is_authorized(self):
+        """Valid bearer token, or a logged-in appointment manager."""
+        token = request.env['ir.config_parameter'].sudo().get_param(
+            'om_service_operation.metrics_token'
+        )
+        authorization = request.httprequest.headers.get('Authorization', '')
+        if token and authorization.startswith('Bearer '):
+            return hmac.compare_digest(authorization[len('Bearer '):], token)
+
+        return request.env.user.has_group('om_service_operation.group_appointment_manager')
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Utilization API Controller
+
+JSON API endpoint exposing the capacity utilization report.
+"""
+
+from odoo import http, fields
+from odoo.http import request
+from odoo.exceptions import UserError
+import pytz
+
+from odoo.addons.om_service_operation.services.utilization_service import (
+    UtilizationService,
+)
+
+
+class UtilizationAPI(http.Controller):
+    """
+    API Controller for Capacity Utilization.
+    
+    Restricted to appointment managers.
+    """
+    
+    @http.route('/booking/api/utilization', type='json', auth='user', methods=['POST'])
+    def utilization(self, date_from, date_to, service_ids=None, tz=None, **kwargs):
+        """
+        Occupancy of each service per weekday and hour of day.
+        
+        Args:
+            date_from: First day in YYYY-MM-DD format
+            date_to: Last day (inclusive) in YYYY-MM-DD format
+            service_ids: Optional list of service IDs (default: all)
+            tz: Optional timezone name (default: user's timezone)
+            
+        Returns:
+            JSON with, per service, the average concurrent bookings and
+            utilization ratio of every (weekday, hour) slot
+        """
+        if not request.env.user.has_group('om_service_operation.group_appointment_manager'):
+            return {'error': 'Access denied'}
+        
+        try:
+            services = None
+            if service_ids:
+                services = request.env['booking.service'].browse(
+                    [int(service_id) for service_id in service_ids]
+                ).exists()
+            
+            return {
+                'services': UtilizationService(request.env).get_utilization(
+                    fields.Date.to_date(date_from),
+                    fields.Date.to_date(date_to),
+                    services=services,
+                    tz_name=tz,
+                ),
+            }
+            
+        except pytz.UnknownTimeZoneError:
+            return {'error': f'Unknown timezone: {tz}'}
+        except (UserError, ValueError) as e:
+            return {'error': str(e)}
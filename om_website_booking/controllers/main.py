@@ -1,23 +1,120 @@
 # -*- coding: utf-8 -*-
 from odoo import http, _
 from odoo.http import request
+from odoo.tools.sql import escape_psql
 from datetime import datetime
+from psycopg2 import OperationalError
+import json
+
+from .replica import use_replica
+
+# Services shown per catalog page
+CATALOG_PAGE_SIZE = 24
+
+# Session key of the visitor's slot hold (see /booking/hold)
+HOLD_SESSION_KEY = "booking_hold_token"
+
+# Query string parameters of the catalog filters
+CATALOG_FILTERS = ("price_min", "price_max", "duration_min", "duration_max")
+
+
+def _parse_float(value):
+    try:
+        return float(value) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def search_catalog_page(search, page, params):
+    """One page of the catalog for the search and filters in ``params``.
+
+    Returns a dict with the page's ``services`` (binary fields read as
+    sizes), the ``total`` number of matches, the parsed ``filters``, the
+    ``url_args`` to keep in page links and the ``next_page`` number, if any.
+    """
+    filters = {key: _parse_float(params.get(key)) for key in CATALOG_FILTERS}
+    try:
+        page = max(int(page), 1)
+    except (TypeError, ValueError):
+        page = 1
+
+    services, total = (
+        request.env["booking.service"]
+        .sudo()
+        .with_context(bin_size=True)
+        .search_catalog(
+            query=search,
+            limit=CATALOG_PAGE_SIZE,
+            offset=(page - 1) * CATALOG_PAGE_SIZE,
+            **filters,
+        )
+    )
+
+    url_args = {key: value for key, value in filters.items() if value is not None}
+    if search:
+        url_args["search"] = search
+
+    return {
+        "services": services,
+        "total": total,
+        "page": page,
+        "filters": filters,
+        "url_args": url_args,
+        "next_page": page + 1 if page * CATALOG_PAGE_SIZE < total else None,
+    }
+
+
+def sitemap_services(env, rule, qs):
+    """Sitemap entries of the service pages, from one query on two columns.
+
+    ``qs`` is the optional text the page URLs are filtered on (link dialog).
+    """
+    query = """
+        SELECT slug, write_date
+          FROM booking_service
+         WHERE active AND slug IS NOT NULL
+    """
+    params = []
+    if qs:
+        query += " AND '/booking/service/' || slug ILIKE %s"
+        params.append(f"%{escape_psql(qs)}%")
+    env.cr.execute(query + " ORDER BY slug", params)
+
+    for slug, write_date in env.cr.fetchall():
+        page = {"loc": f"/booking/service/{slug}"}
+        if write_date:
+            page["lastmod"] = write_date.date()
+        yield page
 
 
 class WebsiteBookingController(http.Controller):
-    @http.route("/booking", type="http", auth="public", website=True, sitemap=True)
-    def booking_service_list(self, **kwargs):
-        services = (
-            request.env["booking.service"]
-            .sudo()
-            .search([("active", "=", True)], order="name")
+    @http.route(
+        ["/booking", "/booking/page/<int:page>"],
+        type="http",
+        auth="public",
+        website=True,
+        sitemap=True,
+        readonly=use_replica,
+    )
+    def booking_service_list(self, page=1, search="", **kwargs):
+        catalog = search_catalog_page(search, page, kwargs)
+
+        values = dict(
+            catalog,
+            search=search,
+            offset=(catalog["page"] - 1) * CATALOG_PAGE_SIZE,
+            pager=request.website.pager(
+                url="/booking",
+                total=catalog["total"],
+                page=catalog["page"],
+                step=CATALOG_PAGE_SIZE,
+                url_args=catalog["url_args"],
+            ),
+            # Read by catalog.js to load the following pages as JSON
+            catalog_query=json.dumps(catalog["url_args"]),
+            page_name="service_booking",
         )
 
-        values = {
-            "services": services,
-            "page_name": "service_booking",
-        }
-
         return request.render("om_website_booking.service_catalog", values)
 
     @http.route(
@@ -25,7 +122,8 @@ class WebsiteBookingController(http.Controller):
         type="http",
         auth="public",
         website=True,
-        sitemap=True,
+        sitemap=sitemap_services,
+        readonly=use_replica,
     )
     def service_detail(self, slug, **kwargs):
         service = (
@@ -83,6 +181,12 @@ class WebsiteBookingController(http.Controller):
         csrf=True,
     )
     def booking_create(self, **post):
+        from odoo.addons.om_service_operation.services.metrics_service import (
+            MetricsService,
+        )
+
+        metrics = MetricsService(request.env)
+
         try:
             required_fields = [
                 "service_id",
@@ -98,6 +202,9 @@ class WebsiteBookingController(http.Controller):
                     errors.append(_("Missing required field: %s") % field)
 
             if errors:
+                metrics.inc(
+                    "booking_rejected_total", service="unknown", reason="invalid"
+                )
                 return request.render(
                     "om_website_booking.booking_error",
                     {
@@ -139,6 +246,9 @@ class WebsiteBookingController(http.Controller):
                     )
 
             except ValueError:
+                metrics.inc(
+                    "booking_rejected_total", service="unknown", reason="invalid"
+                )
                 return request.render(
                     "om_website_booking.booking_error",
                     {
@@ -148,6 +258,7 @@ class WebsiteBookingController(http.Controller):
                 )
 
             if booking_date < datetime.now():
+                metrics.inc("booking_rejected_total", service="unknown", reason="past")
                 return request.render(
                     "om_website_booking.booking_error",
                     {
@@ -168,6 +279,9 @@ class WebsiteBookingController(http.Controller):
             if not re.match(r"^\+?\d{1,4}\s?\d{7,15}$", phone) and not re.match(
                 r"^\d{7,15}$", phone_number
             ):
+                metrics.inc(
+                    "booking_rejected_total", service="unknown", reason="invalid"
+                )
                 return request.render(
                     "om_website_booking.booking_error",
                     {
@@ -213,11 +327,28 @@ class WebsiteBookingController(http.Controller):
             )
             end_date = booking_date + timedelta(hours=service.duration)
 
+            # Slot reserved when the customer selected it (see /booking/hold)
+            hold = (
+                request.env["service.appointment.hold"]
+                .sudo()
+                ._get_active_hold(
+                    request.session.get(HOLD_SESSION_KEY),
+                    service=service,
+                    booking_date=booking_date,
+                )
+            )
+
             has_overlap, overlapping, error_msg = Appointment.check_overlap(
-                booking_date=booking_date, end_date=end_date, service_id=service.id
+                booking_date=booking_date,
+                end_date=end_date,
+                service_id=service.id,
+                exclude_hold=hold.token,
             )
 
             if has_overlap:
+                metrics.inc(
+                    "booking_rejected_total", service=service.id, reason="unavailable"
+                )
                 return request.render(
                     "om_website_booking.booking_error",
                     {
@@ -227,15 +358,22 @@ class WebsiteBookingController(http.Controller):
                 )
 
             try:
-                appointment = Appointment.create(
-                    {
-                        "customer_id": customer.id,
-                        "service_id": int(post.get("service_id")),
-                        "booking_date": booking_date,
-                        "notes": post.get("notes", ""),
-                        "state": "draft",
-                    }
-                )
+                # Rejected by the capacity constraint when the slot was
+                # taken meanwhile: roll the insert back with it
+                with request.env.cr.savepoint():
+                    appointment = Appointment.create(
+                        {
+                            "customer_id": customer.id,
+                            "service_id": int(post.get("service_id")),
+                            "booking_date": booking_date,
+                            "notes": post.get("notes", ""),
+                            "state": "draft",
+                            "origin": "website",
+                        }
+                    )
+                hold._release()
+                request.session.pop(HOLD_SESSION_KEY, None)
+                metrics.inc("booking_created_total", service=service.id)
 
                 if _logger.isEnabledFor(logging.DEBUG):
                     _logger.debug(
@@ -270,6 +408,10 @@ class WebsiteBookingController(http.Controller):
 
                 return request.redirect("/booking/success/%s" % appointment.id)
 
+            except OperationalError:
+                # Serialization failures of the capacity check: let Odoo
+                # retry the request on a fresh snapshot
+                raise
             except Exception as e:
                 from odoo.exceptions import ValidationError
 
@@ -280,6 +422,11 @@ class WebsiteBookingController(http.Controller):
                     or "conflicts" in error_message.lower()
                     or "ValidationError" in str(type(e))
                 ):
+                    metrics.inc(
+                        "booking_rejected_total",
+                        service=service.id,
+                        reason="unavailable",
+                    )
                     errors = [
                         _(
                             "The selected time slot is not available. Please choose a different time."
@@ -291,6 +438,9 @@ class WebsiteBookingController(http.Controller):
                             error_message.split("\n")[0]
                         ]  # Get first line of error
                 else:
+                    metrics.inc(
+                        "booking_rejected_total", service=service.id, reason="error"
+                    )
                     errors = [
                         _(
                             "An error occurred while creating your booking. Please try again."
@@ -305,7 +455,10 @@ class WebsiteBookingController(http.Controller):
                     },
                 )
 
+        except OperationalError:
+            raise
         except Exception as e:
+            metrics.inc("booking_rejected_total", service="unknown", reason="error")
             error_message = str(e)
             errors = [_("An unexpected error occurred: %s") % error_message]
 
@@ -50,12 +50,20 @@ class CustomerPortalAppointments(CustomerPortal):
                 "label": _("Confirmed"),
                 "domain": [("state", "=", "confirmed")],
             },
+            "archived": {
+                "label": _("Archived"),
+                "domain": [],
+            },
         }
 
         if not filterby:
             filterby = "all"
         domain += filter_options.get(filterby, filter_options["all"])["domain"]
 
+        if filterby == "archived":
+            # Archived bookings live in their own table, read-only
+            Appointment = request.env["service.appointment.archive"]
+
         sort_options = {
             "date_desc": {"label": _("Newest First"), "order": "booking_date desc"},
             "date_asc": {"label": _("Oldest First"), "order": "booking_date asc"},
@@ -127,6 +135,31 @@ class CustomerPortalAppointments(CustomerPortal):
 
         return request.render("om_website_booking.portal_appointment_detail", values)
 
+    @http.route(
+        ["/my/appointments/archive/<int:archive_id>"],
+        type="http",
+        auth="user",
+        website=True,
+    )
+    def portal_appointment_archive_detail(self, archive_id, access_token=None, **kw):
+        try:
+            archive_sudo = self._document_check_access(
+                "service.appointment.archive", archive_id, access_token=access_token
+            )
+        except (AccessError, Forbidden):
+            return request.redirect("/my")
+
+        values = {
+            "appointment": archive_sudo,
+            "page_name": "appointment_detail",
+            "can_cancel": False,
+            "time_until_appointment": None,
+            "error": None,
+            "message": None,
+        }
+
+        return request.render("om_website_booking.portal_appointment_detail", values)
+
     @http.route(
         ["/my/appointments/<int:appointment_id>/cancel"],
         type="http",
@@ -157,7 +190,7 @@ class CustomerPortalAppointments(CustomerPortal):
 
         appointment_sudo.action_cancel()
 
-        appointment_sudo.message_post(
+        appointment_sudo._post_chatter(
             body=_("Cancelled by customer via portal."),
             subject=_("Appointment Cancelled"),
         )
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Read-replica routing of the public read-only routes.
+
+Routes declared with ``readonly=use_replica`` run on a cursor of the
+read-only replica configured with ``db_replica_host``/``db_replica_port``,
+as long as the replica is reachable and lags the primary by at most
+``booking_replica_max_lag`` seconds (server configuration, default 5).
+Otherwise they run on the primary. A route writing to the database on the
+replica is retried on the primary by Odoo.
+"""
+
+from contextlib import closing
+import logging
+import time
+
+from odoo import sql_db
+from odoo.http import request
+from odoo.tools import config
+
+_logger = logging.getLogger(__name__)
+
+# Seconds between two measurements of the replica lag by a worker
+REPLICA_CHECK_INTERVAL = 5
+
+DEFAULT_MAX_LAG = 5
+
+# Zero when the replica has replayed everything it received
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+# Last measurement per database: {dbname: (monotonic time, usable)}
+_replica_status = {}
+
+
+def use_replica(controller):
+    """``readonly`` predicate: whether the replica is fresh enough to serve."""
+    if not config.get("db_replica_host") and not config.get("db_replica_port"):
+        # No replica: read-only cursors are opened on the primary
+        return True
+
+    dbname = request.db
+    now = time.monotonic()
+    checked = _replica_status.get(dbname)
+    if checked and now - checked[0] < REPLICA_CHECK_INTERVAL:
+        return checked[1]
+
+    max_lag = float(config.get("booking_replica_max_lag") or DEFAULT_MAX_LAG)
+    try:
+        lag = get_replica_lag(dbname)
+    except Exception as e:
+        _logger.warning(
+            "Replica of %s unavailable, reading from the primary: %s", dbname, e
+        )
+        usable = False
+    else:
+        usable = lag <= max_lag
+        if not usable:
+            _logger.warning(
+                "Replica of %s is %.1fs behind (max %ss), reading from the primary",
+                dbname,
+                lag,
+                max_lag,
+            )
+
+    _replica_status[dbname] = (now, usable)
+    return usable
+
+
+def get_replica_lag(dbname):
+    """Replication delay of the replica of ``dbname``, in seconds."""
+    with closing(sql_db.db_connect(dbname, readonly=True).cursor()) as cr:
+        cr.execute(REPLICA_LAG_QUERY)
+        return float(cr.fetchone()[0] or 0.0)
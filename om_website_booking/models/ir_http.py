@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+from odoo.http import request
+
+from odoo.addons.om_service_operation.services.profiler_service import ProfilerService
+
+# Controllers of this module, profiled when sampled
+CONTROLLERS_PACKAGE = "odoo.addons.om_website_booking.controllers"
+
+
+class IrHttp(models.AbstractModel):
+    _inherit = "ir.http"
+
+    @classmethod
+    def _dispatch(cls, endpoint):
+        """Run the booking controllers under the sampling profiler.
+
+        Stacks are aggregated per URL rule of the route (its first one when
+        it has several).
+        """
+        original = getattr(endpoint, "original_endpoint", endpoint)
+        if not getattr(original, "__module__", "").startswith(CONTROLLERS_PACKAGE):
+            return super()._dispatch(endpoint)
+
+        route = endpoint.routing["routes"][0]
+        with ProfilerService(request.env).profile(route):
+            return super()._dispatch(endpoint)
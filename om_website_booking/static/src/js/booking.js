@@ -1,17 +1,160 @@
+// How long a fetched day is reused before asking the server again (ms)
+const AVAILABILITY_CACHE_TTL = 30 * 1000;
+
 function initBooking() {
   const selectedDateInput = document.getElementById("selected_date");
   const timeSlotContainer = document.getElementById("time_slot_container");
   const timeSlotsGrid = document.getElementById("time_slots_grid");
   const slotsLoading = document.getElementById("slots_loading");
   const bookingDateHidden = document.getElementById("booking_date");
+  const holdTokenHidden = document.getElementById("hold_token");
   const bookingForm = document.getElementById("bookingForm");
 
   let selectedSlot = null;
+  let currentSlots = [];
+  // Slot hold taken on selection, converted into the booking on submit
+  let holdToken = null;
+  // UTC bounds of that hold, left out of the pushed occupancy
+  let ownHold = null;
+  // Updates about our own holds (taken or released) are not applied
+  const ownHoldIds = new Set();
 
   if (selectedDateInput && bookingForm) {
     const serviceIdInput = document.querySelector('input[name="service_id"]');
     const serviceId = serviceIdInput ? serviceIdInput.value : null;
 
+    // Days fetched recently: "date|hold token" -> { date, expires, promise,
+    // controller, result }. The hold token is part of the key since the
+    // visitor's own hold is not counted by the server.
+    const availabilityCache = new Map();
+    // Request of the displayed day, aborted when another day is picked
+    let displayController = null;
+
+    function fetchAvailability(date, signal) {
+      return fetch("/booking/check_availability", {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+        },
+        body: JSON.stringify({
+          jsonrpc: "2.0",
+          method: "call",
+          params: {
+            service_id: parseInt(serviceId),
+            date: date,
+          },
+        }),
+        signal: signal,
+      })
+        .then((response) => response.json())
+        .then((data) => {
+          if (data.error) {
+            return { error: "Error loading availability. Please try again." };
+          }
+          return data.result;
+        });
+    }
+
+    function cacheKey(date) {
+      return `${date}|${holdToken || ""}`;
+    }
+
+    // Cached availability of a day, fetched on a miss. Failed requests and
+    // days answered with an error are not kept.
+    function loadAvailability(date, controller) {
+      const now = Date.now();
+      const key = cacheKey(date);
+      const cached = availabilityCache.get(key);
+      if (cached && cached.expires > now) {
+        return cached.promise;
+      }
+
+      availabilityCache.forEach((entry, entryKey) => {
+        if (entry.expires <= now && !entry.controller) {
+          availabilityCache.delete(entryKey);
+        }
+      });
+
+      const entry = {
+        date: date,
+        expires: now + AVAILABILITY_CACHE_TTL,
+        controller: controller,
+        promise: null,
+        result: null,
+      };
+      entry.promise = fetchAvailability(date, controller.signal).then(
+        (result) => {
+          entry.controller = null;
+          if (result.error) {
+            if (availabilityCache.get(key) === entry) {
+              availabilityCache.delete(key);
+            }
+          } else {
+            entry.result = result;
+          }
+          return result;
+        },
+        (error) => {
+          if (availabilityCache.get(key) === entry) {
+            availabilityCache.delete(key);
+          }
+          throw error;
+        }
+      );
+      availabilityCache.set(key, entry);
+      return entry.promise;
+    }
+
+    // Listen to the bus channels of every cached day (and of the day just
+    // loaded), so none of them misses the updates that invalidate it
+    function announceChannels(loaded) {
+      const now = Date.now();
+      const channels = new Set((loaded && loaded.channels) || []);
+      availabilityCache.forEach((entry) => {
+        if (entry.result && entry.expires > now) {
+          (entry.result.channels || []).forEach((channel) =>
+            channels.add(channel)
+          );
+        }
+      });
+      document.dispatchEvent(
+        new CustomEvent("booking:channels", {
+          detail: { channels: [...channels] },
+        })
+      );
+    }
+
+    function shiftDate(date, days) {
+      const shifted = new Date(`${date}T00:00:00Z`);
+      shifted.setUTCDate(shifted.getUTCDate() + days);
+      return shifted.toISOString().slice(0, 10);
+    }
+
+    // Warm the cache with the days around the displayed one, and cancel
+    // the prefetches of days the visitor moved away from
+    function prefetchAround(date) {
+      const neighbours = [shiftDate(date, -1), shiftDate(date, 1)].filter(
+        (day) => !selectedDateInput.min || day >= selectedDateInput.min
+      );
+
+      availabilityCache.forEach((entry) => {
+        if (
+          entry.controller &&
+          entry.controller !== displayController &&
+          entry.date !== date &&
+          !neighbours.includes(entry.date)
+        ) {
+          entry.controller.abort();
+        }
+      });
+
+      neighbours.forEach((day) => {
+        loadAvailability(day, new AbortController())
+          .then(announceChannels)
+          .catch(() => {});
+      });
+    }
+
     selectedDateInput.addEventListener("change", async function () {
       const selectedDate = this.value;
 
@@ -23,35 +166,25 @@ function initBooking() {
       slotsLoading.style.display = "block";
       timeSlotsGrid.innerHTML = "";
       selectedSlot = null;
+      currentSlots = [];
       bookingDateHidden.value = "";
 
-      try {
-        const response = await fetch("/booking/check_availability", {
-          method: "POST",
-          headers: {
-            "Content-Type": "application/json",
-          },
-          body: JSON.stringify({
-            jsonrpc: "2.0",
-            method: "call",
-            params: {
-              service_id: parseInt(serviceId),
-              date: selectedDate,
-            },
-          }),
-        });
-
-        const data = await response.json();
+      // The previous day's answer is no longer needed
+      if (displayController) {
+        displayController.abort();
+      }
+      const controller = new AbortController();
+      displayController = controller;
 
-        slotsLoading.style.display = "none";
+      try {
+        const result = await loadAvailability(selectedDate, controller);
 
-        if (data.error) {
-          timeSlotsGrid.innerHTML =
-            '<div class="alert alert-danger">Error loading availability. Please try again.</div>';
+        // Another day was picked while this one was loading
+        if (controller !== displayController) {
           return;
         }
 
-        const result = data.result;
+        slotsLoading.style.display = "none";
 
         if (result.error) {
           timeSlotsGrid.innerHTML = `<div class="alert alert-danger">${result.error}</div>`;
@@ -59,7 +192,14 @@ function initBooking() {
         }
 
         renderTimeSlots(result.slots);
+        announceChannels(result);
+
+        prefetchAround(selectedDate);
       } catch (error) {
+        if (controller !== displayController) {
+          return;
+        }
+
         slotsLoading.style.display = "none";
         timeSlotsGrid.innerHTML =
           '<div class="alert alert-danger">Failed to load time slots. Please refresh and try again.</div>';
@@ -67,6 +207,8 @@ function initBooking() {
     });
 
     function renderTimeSlots(slots) {
+      currentSlots = slots || [];
+
       if (!slots || slots.length === 0) {
         timeSlotsGrid.innerHTML =
           '<div class="alert alert-warning">No time slots available for this date.</div>';
@@ -76,51 +218,178 @@ function initBooking() {
       timeSlotsGrid.innerHTML = "";
 
       slots.forEach((slot) => {
-        const slotDiv = document.createElement("div");
-        slotDiv.className = "time-slot";
-
-        if (slot.is_past) {
-          slotDiv.classList.add("past", "disabled");
-        } else if (slot.is_full) {
-          slotDiv.classList.add("full", "disabled");
-        } else if (slot.available) {
-          slotDiv.classList.add("available");
+        timeSlotsGrid.appendChild(buildSlotElement(slot));
+      });
+    }
+
+    function buildSlotElement(slot) {
+      const slotDiv = document.createElement("div");
+      slotDiv.className = "time-slot";
+      slotDiv.dataset.start = slot.start_utc;
+
+      if (slot.is_past) {
+        slotDiv.classList.add("past", "disabled");
+      } else if (slot.is_full) {
+        slotDiv.classList.add("full", "disabled");
+      } else if (slot.datetime === selectedSlot) {
+        slotDiv.classList.add("selected");
+      } else if (slot.available) {
+        slotDiv.classList.add("available");
+      }
+
+      const slotTime = document.createElement("span");
+      slotTime.className = "slot-time";
+      slotTime.textContent = slot.display;
+
+      const slotCapacity = document.createElement("span");
+      slotCapacity.className = "slot-capacity";
+
+      if (slot.is_past) {
+        slotCapacity.textContent = "Past";
+      } else if (slot.is_full) {
+        slotCapacity.textContent = `Full (${slot.current_bookings}/${slot.max_capacity})`;
+      } else if (slot.available) {
+        if (slot.max_capacity === 0) {
+          slotCapacity.textContent = "Unlimited";
+        } else {
+          const remaining = slot.max_capacity - slot.current_bookings;
+          slotCapacity.textContent = `${remaining} left`;
         }
+      }
 
-        const slotTime = document.createElement("span");
-        slotTime.className = "slot-time";
-        slotTime.textContent = slot.display;
+      slotDiv.appendChild(slotTime);
+      slotDiv.appendChild(slotCapacity);
 
-        const slotCapacity = document.createElement("span");
-        slotCapacity.className = "slot-capacity";
+      if (slot.available) {
+        slotDiv.addEventListener("click", function () {
+          selectTimeSlot(this, slot.datetime);
+        });
+      }
 
-        if (slot.is_past) {
-          slotCapacity.textContent = "Past";
-        } else if (slot.is_full) {
-          slotCapacity.textContent = `Full (${slot.current_bookings}/${slot.max_capacity})`;
-        } else if (slot.available) {
-          if (slot.max_capacity === 0) {
-            slotCapacity.textContent = "Unlimited";
-          } else {
-            const remaining = slot.max_capacity - slot.current_bookings;
-            slotCapacity.textContent = `${remaining} left`;
-          }
-        }
+      return slotDiv;
+    }
 
-        slotDiv.appendChild(slotTime);
-        slotDiv.appendChild(slotCapacity);
+    // Occupancy changes pushed over the bus (see booking_live.js) carry the
+    // capacity timeline around the change, already counted by the server:
+    // the peak of each overlapping slot is recomputed from it, on the page
+    // and in the cache, without fetching the day again. Bounds are UTC
+    // "YYYY-MM-DD HH:MM:SS" strings, so they compare as text.
+    function overlaps(slot, update) {
+      return slot.start_utc < update.end && slot.end_utc > update.start;
+    }
 
-        if (slot.available) {
-          slotDiv.addEventListener("click", function () {
-            selectTimeSlot(this, slot.datetime);
-          });
+    function applyTimeline(slot, timeline) {
+      let peak = 0;
+      timeline.forEach((segment) => {
+        if (segment.start < slot.end_utc && segment.end > slot.start_utc) {
+          // The server does not count the visitor's own hold
+          const own =
+            ownHold &&
+            segment.start >= ownHold.start &&
+            segment.end <= ownHold.end;
+          peak = Math.max(peak, segment.bookings - (own ? 1 : 0));
         }
+      });
+
+      slot.current_bookings = peak;
+      slot.is_full = slot.max_capacity > 0 && peak >= slot.max_capacity;
+      slot.available = !slot.is_past && !slot.is_full;
+    }
+
+    document.addEventListener("booking:slot-update", function (ev) {
+      const update = ev.detail;
 
-        timeSlotsGrid.appendChild(slotDiv);
+      if (
+        !update ||
+        !update.timeline ||
+        String(update.service_id) !== String(serviceId)
+      ) {
+        return;
+      }
+
+      // Our own hold is already reflected in the selection
+      if (update.hold_id && ownHoldIds.has(update.hold_id)) {
+        return;
+      }
+
+      // Patch the cached days of the current hold; drop the others (and
+      // the ones still loading) when the change overlaps them
+      const currentKeySuffix = `|${holdToken || ""}`;
+      availabilityCache.forEach((entry, key) => {
+        const slots = entry.result ? entry.result.slots || [] : null;
+        if (slots && key.endsWith(currentKeySuffix)) {
+          slots
+            .filter((slot) => overlaps(slot, update))
+            .forEach((slot) => applyTimeline(slot, update.timeline));
+        } else if (!slots || slots.some((slot) => overlaps(slot, update))) {
+          availabilityCache.delete(key);
+        }
       });
+
+      currentSlots
+        .filter((slot) => overlaps(slot, update))
+        .forEach((slot) => {
+          applyTimeline(slot, update.timeline);
+
+          if (!slot.available && slot.datetime === selectedSlot) {
+            selectedSlot = null;
+            bookingDateHidden.value = "";
+          }
+
+          const slotElement = timeSlotsGrid.querySelector(
+            `.time-slot[data-start="${slot.start_utc}"]`
+          );
+          if (slotElement) {
+            slotElement.replaceWith(buildSlotElement(slot));
+          }
+        });
+    });
+
+    async function holdTimeSlot(datetime) {
+      try {
+        const response = await fetch("/booking/hold", {
+          method: "POST",
+          headers: {
+            "Content-Type": "application/json",
+          },
+          body: JSON.stringify({
+            jsonrpc: "2.0",
+            method: "call",
+            params: {
+              service_id: parseInt(serviceId),
+              datetime_local: datetime,
+            },
+          }),
+        });
+
+        const data = await response.json();
+        const result = data.result || {};
+
+        if (result.unavailable) {
+          holdToken = null;
+          ownHold = null;
+          holdTokenHidden.value = "";
+          return result;
+        }
+
+        holdToken = result.token || null;
+        const held = currentSlots.find((slot) => slot.datetime === datetime);
+        ownHold =
+          holdToken && held
+            ? { start: held.start_utc, end: held.end_utc }
+            : null;
+        if (result.hold_id) {
+          ownHoldIds.add(result.hold_id);
+        }
+        holdTokenHidden.value = holdToken || "";
+        return result;
+      } catch (error) {
+        // The booking is still checked on submit, the hold is best effort
+        return {};
+      }
     }
 
-    function selectTimeSlot(slotElement, datetime) {
+    async function selectTimeSlot(slotElement, datetime) {
       const previousSelected = timeSlotsGrid.querySelector(
         ".time-slot.selected"
       );
@@ -135,6 +404,29 @@ function initBooking() {
       bookingDateHidden.value = datetime;
       selectedSlot = datetime;
 
+      if (holdTokenHidden) {
+        const result = await holdTimeSlot(datetime);
+
+        if (result.unavailable && selectedSlot === datetime) {
+          const slot = currentSlots.find((s) => s.datetime === datetime);
+          selectedSlot = null;
+          bookingDateHidden.value = "";
+
+          if (slot) {
+            slot.is_full = true;
+            slot.available = false;
+            slot.current_bookings = Math.max(
+              slot.current_bookings,
+              slot.max_capacity
+            );
+            slotElement.replaceWith(buildSlotElement(slot));
+          }
+
+          alert(result.error);
+          return;
+        }
+      }
+
       const notesSection = document.querySelector('textarea[name="notes"]');
       if (notesSection) {
         setTimeout(() => {
@@ -274,10 +566,10 @@ function initBooking() {
       observer.observe(card);
     });
   }
+}
 
-  if (document.readyState === "loading") {
-    document.addEventListener("DOMContentLoaded", initBooking);
-  } else {
-    initBooking();
-  }
+if (document.readyState === "loading") {
+  document.addEventListener("DOMContentLoaded", initBooking);
+} else {
+  initBooking();
 }
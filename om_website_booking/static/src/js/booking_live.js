@@ -0,0 +1,33 @@
+/** @odoo-module **/
+
+import { registry } from "@web/core/registry";
+
+/**
+ * Bridges Odoo's bus to the booking form.
+ *
+ * booking.js announces the channels of the displayed and cached days with a
+ * "booking:channels" event; occupancy changes (with the capacity timeline
+ * around them) pushed by the server on those channels are re-dispatched as
+ * "booking:slot-update" events.
+ */
+export const bookingLiveSlotsService = {
+  dependencies: ["bus_service"],
+
+  start(env, { bus_service }) {
+    let channels = [];
+
+    document.addEventListener("booking:channels", (ev) => {
+      channels.forEach((channel) => bus_service.deleteChannel(channel));
+      channels = ev.detail.channels || [];
+      channels.forEach((channel) => bus_service.addChannel(channel));
+    });
+
+    bus_service.subscribe("om_booking/slot_update", (payload) => {
+      document.dispatchEvent(
+        new CustomEvent("booking:slot-update", { detail: payload })
+      );
+    });
+  },
+};
+
+registry.category("services").add("booking_live_slots", bookingLiveSlotsService);
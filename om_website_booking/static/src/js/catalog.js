@@ -0,0 +1,173 @@
+// Infinite scroll of the service catalog: the following pages are fetched
+// as compact JSON cards from /booking/services when the end of the grid
+// comes into view. The pager stays the fallback without JavaScript or when
+// a page fails to load.
+
+// Distance from the end of the grid at which the next page is requested
+const CATALOG_PREFETCH_MARGIN = 400;
+
+function initCatalog() {
+  const grid = document.getElementById("service_catalog_grid");
+  const sentinel = document.getElementById("service_catalog_sentinel");
+
+  if (
+    !grid ||
+    !sentinel ||
+    !grid.dataset.nextPage ||
+    !("IntersectionObserver" in window)
+  ) {
+    return;
+  }
+
+  const query = JSON.parse(grid.dataset.query || "{}");
+  const pagers = document.querySelectorAll(".catalog-pager");
+  let nextPage = parseInt(grid.dataset.nextPage);
+  let loading = false;
+
+  pagers.forEach((pager) => pager.classList.add("d-none"));
+  sentinel.classList.remove("d-none");
+
+  const observer = new IntersectionObserver(
+    (entries) => {
+      if (entries.some((entry) => entry.isIntersecting)) {
+        loadNextPage();
+      }
+    },
+    { rootMargin: `0px 0px ${CATALOG_PREFETCH_MARGIN}px 0px` }
+  );
+  observer.observe(sentinel);
+
+  function stop() {
+    observer.disconnect();
+    sentinel.remove();
+  }
+
+  async function loadNextPage() {
+    if (loading || !nextPage) {
+      return;
+    }
+    loading = true;
+
+    try {
+      const response = await fetch("/booking/services", {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+        },
+        body: JSON.stringify({
+          jsonrpc: "2.0",
+          method: "call",
+          params: Object.assign({}, query, { page: nextPage }),
+        }),
+      });
+
+      const data = await response.json();
+      if (data.error || !data.result) {
+        throw new Error("Error loading services");
+      }
+
+      const fragment = document.createDocumentFragment();
+      data.result.services.forEach((card) => {
+        fragment.appendChild(buildServiceCard(card));
+      });
+      grid.appendChild(fragment);
+
+      nextPage = data.result.next_page;
+      if (!nextPage) {
+        stop();
+      }
+    } catch (error) {
+      // Let the visitor page through the rest instead
+      nextPage = null;
+      stop();
+      pagers.forEach((pager) => pager.classList.remove("d-none"));
+    } finally {
+      loading = false;
+    }
+
+    // A short page may leave the end of the grid in view
+    if (
+      nextPage &&
+      sentinel.getBoundingClientRect().top <
+        window.innerHeight + CATALOG_PREFETCH_MARGIN
+    ) {
+      loadNextPage();
+    }
+  }
+
+  // Same markup as the cards rendered by the service_catalog template
+  function buildServiceCard(card) {
+    const column = document.createElement("div");
+    column.className = "col-6 col-md-6 col-lg-4";
+
+    const link = document.createElement("a");
+    link.href = card.url;
+    link.className = "text-decoration-none d-block h-100";
+
+    const serviceCard = document.createElement("div");
+    serviceCard.className = "card h-100 shadow-sm service-card";
+
+    const imageWrapper = document.createElement("div");
+    imageWrapper.className = "service-image-wrapper";
+    if (card.image_url) {
+      const image = document.createElement("img");
+      image.src = card.image_url;
+      image.className = "card-img-top service-image";
+      image.loading = "lazy";
+      image.alt = card.name;
+      imageWrapper.appendChild(image);
+    } else {
+      const placeholder = document.createElement("div");
+      placeholder.className = "service-image-placeholder";
+      placeholder.innerHTML = '<i class="fa fa-briefcase fa-4x text-muted"></i>';
+      imageWrapper.appendChild(placeholder);
+    }
+
+    const body = document.createElement("div");
+    body.className = "card-body d-flex flex-column";
+
+    const title = document.createElement("h5");
+    title.className = "card-title fw-bold mb-2";
+    title.textContent = card.name;
+
+    const description = document.createElement("p");
+    description.className = "card-text text-muted flex-grow-1 d-none d-md-block";
+    description.textContent =
+      card.description || "Professional service tailored to your needs.";
+
+    const meta = document.createElement("div");
+    meta.className = "service-meta mt-2";
+    const metaRow = document.createElement("div");
+    metaRow.className = "d-flex justify-content-between align-items-center";
+
+    const duration = document.createElement("small");
+    duration.className = "text-muted";
+    duration.innerHTML = '<i class="fa fa-clock-o me-1"></i>';
+    duration.appendChild(document.createTextNode(card.duration_display));
+
+    const price = document.createElement("span");
+    price.className = "fw-bold text-primary";
+    price.textContent = card.price_display;
+
+    metaRow.appendChild(duration);
+    metaRow.appendChild(price);
+    meta.appendChild(metaRow);
+
+    body.appendChild(title);
+    body.appendChild(description);
+    body.appendChild(meta);
+
+    serviceCard.appendChild(imageWrapper);
+    serviceCard.appendChild(body);
+    link.appendChild(serviceCard);
+    column.appendChild(link);
+
+    return column;
+  }
+}
+
+if (document.readyState === "loading") {
+  document.addEventListener("DOMContentLoaded", initCatalog);
+} else {
+  initCatalog();
+}